@@ -5,6 +5,7 @@ from fastapi.templating import Jinja2Templates
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 import pandas as pd
 import os
+import asyncio
 import tempfile
 import uuid
 import json
@@ -70,6 +71,10 @@ def get_user_id(username: str) -> Optional[str]:
 # Global user plans dictionary to store user plan information
 user_plans = {}
 
+def get_user_plan_name(current_user: Optional[str]) -> str:
+    """Return "premium" for users with a premium plan, otherwise "basic"."""
+    return "premium" if user_plans.get(current_user) == "premium" else "basic"
+
 
 def add_user_dataset(user_id: str, filename: str, mode: str, format_type: str, entity_count: int, file_content: Optional[bytes] = None):
     """Add a dataset to a user's history using MongoDB."""
@@ -225,18 +230,28 @@ create_default_admin()
 
 app = FastAPI()
 
+@app.on_event("startup")
+async def warmup_translation_models():
+    """Preload translation models in the background when TRANSLATION_WARMUP is enabled"""
+    if os.getenv("TRANSLATION_WARMUP", "False").lower() == "true":
+        from enhanced_nlp import multi_language_processor
+        asyncio.get_running_loop().run_in_executor(None, multi_language_processor.warmup)
+
+@app.on_event("startup")
+async def warmup_nlp_models():
+    """Preload the enhanced NER and classifier models in the background when NLP_WARMUP is enabled"""
+    if os.getenv("NLP_WARMUP", "False").lower() == "true":
+        from enhanced_nlp import enhanced_nlp_processor
+        asyncio.get_running_loop().run_in_executor(None, enhanced_nlp_processor.warmup)
+
 @app.get("/plans", response_class=HTMLResponse)
 async def plans_page(request: Request):
     """Display plans page"""
     # Get current user
     current_user = get_current_user(request)
     
-    # Default to basic plan
-    user_plan = "basic"
-    
-    # Check if user has premium plan
-    if current_user and current_user in user_plans and user_plans[current_user] == "premium":
-        user_plan = "premium"
+    # Basic unless the user upgraded to premium
+    user_plan = get_user_plan_name(current_user)
     
     return templates.TemplateResponse("plans.html", {
         "request": request,
@@ -250,12 +265,8 @@ async def get_user_plan(request: Request):
     # Get current user
     current_user = get_current_user(request)
     
-    # Default to basic plan
-    user_plan = "basic"
-    
-    # Check if user has premium plan
-    if current_user and current_user in user_plans and user_plans[current_user] == "premium":
-        user_plan = "premium"
+    # Basic unless the user upgraded to premium
+    user_plan = get_user_plan_name(current_user)
     
     return JSONResponse({"plan": user_plan})
 
@@ -397,7 +408,7 @@ async def generate_dataset(
         
         # Lazy load the processing modules
         from preprocess import clean_text, split_sentences
-        from exporter import export_to_csv, export_to_json
+        from exporter import dumps_json, export_to_csv, export_to_json
         
         # Handle spaCy format specially
         if output_format == "spacy":
@@ -442,7 +453,7 @@ async def generate_dataset(
             spacy_data = convert_function(sentences)
             
             # Convert to JSON bytes for storage
-            json_content = json.dumps(spacy_data, ensure_ascii=False, indent=2)
+            json_content = dumps_json(spacy_data)
             file_content = json_content.encode('utf-8')
             
             # Save file content
@@ -510,26 +521,18 @@ async def generate_dataset(
             # Apply labeling based on mode
             labeled_data = label_function(sentences)
             
-            # Convert to DataFrame
-            df = pd.DataFrame(labeled_data)
+            # Convert to DataFrame, without the character offsets kept for spaCy format
+            df = pd.DataFrame(labeled_data).drop(columns=["start", "end"], errors="ignore")
             
-            # Convert to bytes for storage
+            # Convert to bytes for storage, in memory rather than through a temporary file
+            buffer = io.StringIO()
             if output_format == "json":
                 filename = f"dataset{custom_part}_{file_id}.json"
-                # Use temporary file approach for exporter functions
-                temp_file_path = f"temp_{file_id}.json"
-                export_to_json(df, temp_file_path)
-                with open(temp_file_path, "rb") as f:
-                    file_content = f.read()
-                os.remove(temp_file_path)  # Clean up temp file
+                export_to_json(df, buffer)
             else:  # Default to CSV
                 filename = f"dataset{custom_part}_{file_id}.csv"
-                # Use temporary file approach for exporter functions
-                temp_file_path = f"temp_{file_id}.csv"
-                export_to_csv(df, temp_file_path)
-                with open(temp_file_path, "rb") as f:
-                    file_content = f.read()
-                os.remove(temp_file_path)  # Clean up temp file
+                export_to_csv(df, buffer)
+            file_content = buffer.getvalue().encode('utf-8')
             
             # Add to user history if user is logged in
             if current_user:
@@ -654,9 +657,9 @@ async def view_dataset(dataset_id: str, request: Request):
         if filename.endswith(".json"):
             # Try to parse JSON for better formatting
             try:
-                import json
+                from exporter import dumps_json
                 parsed_content = json.loads(file_content.decode('utf-8'))
-                formatted_content = json.dumps(parsed_content, indent=2, ensure_ascii=False)
+                formatted_content = dumps_json(parsed_content)
             except:
                 formatted_content = file_content.decode('utf-8')
             content_type = "application/json"
@@ -1139,12 +1142,8 @@ async def api_get_current_user_plan(request: Request):
     # Get current user
     current_user = get_current_user(request)
     
-    # Default to basic plan
-    user_plan = "basic"
-    
-    # Check if user has premium plan
-    if current_user and current_user in user_plans and user_plans[current_user] == "premium":
-        user_plan = "premium"
+    # Basic unless the user upgraded to premium
+    user_plan = get_user_plan_name(current_user)
     
     return JSONResponse({"plan": user_plan})
 
@@ -1621,9 +1620,8 @@ async def edit_dataset(dataset_id: str, request: Request,
                         updated_dataset["entity_count"] = len(data["entities"])
                 # For CSV, count lines
                 elif original_dataset["filename"].endswith(".csv"):
-                    lines = file_content.strip().split('\n')
-                    # Subtract 1 for header row
-                    updated_dataset["entity_count"] = max(0, len(lines) - 1)
+                    # Rows after the header, counted without splitting the content into lines
+                    updated_dataset["entity_count"] = file_content.strip().count('\n')
             except Exception as e:
                 print(f"Error updating entity count: {e}")
         
@@ -1885,9 +1883,9 @@ async def view_community_dataset(dataset_id: str, request: Request):
         if filename.endswith(".json"):
             # Try to parse JSON for better formatting
             try:
-                import json
+                from exporter import dumps_json
                 parsed_content = json.loads(file_content.decode('utf-8'))
-                formatted_content = json.dumps(parsed_content, indent=2, ensure_ascii=False)
+                formatted_content = dumps_json(parsed_content)
             except:
                 formatted_content = file_content.decode('utf-8')
             content_type = "application/json"
@@ -3,38 +3,72 @@ Caching utilities for improved performance
 """
 
 import asyncio
+import heapq
 import json
 import pickle
 import hashlib
-from typing import Any, Optional, Dict, Union
-from datetime import datetime, timedelta
+import inspect
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Dict, Iterable, List, Tuple, Union
+from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+def compact_expiry_heap(heap: List[Tuple[float, str]], live_count: int,
+                        live_items: Iterable[Tuple[float, str]]) -> List[Tuple[float, str]]:
+    """
+    Rebuild an (expires_at, key) expiry heap from the live entries once stale items dominate
+    
+    Overwrites, evictions and deletes leave stale items behind, so without this the heap
+    grows with every set() until cleanup runs.
+    
+    Args:
+        heap (List[Tuple[float, str]]): Current expiry heap
+        live_count (int): Number of live cache entries
+        live_items (Iterable[Tuple[float, str]]): (expires_at, key) for each live entry, only read on rebuild
+        
+    Returns:
+        List[Tuple[float, str]]: The same heap, or a rebuilt one at most live_count items long
+    """
+    if len(heap) <= 2 * live_count:
+        return heap
+    heap = list(live_items)
+    heapq.heapify(heap)
+    return heap
+
 class CacheManager:
     """Advanced caching manager with TTL and serialization."""
     
-    def __init__(self, default_ttl: int = 300):
-        self._cache: Dict[str, Dict[str, Any]] = {}
+    def __init__(self, default_ttl: int = 300, max_entries: int = 10_000):
+        # Ordered oldest-used first, so the least recently used entry is evicted at capacity
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._max_entries = max_entries
+        # (expires_at, key) min-heap, so cleanup only visits entries that have expired
+        self._expiry_heap: List[Tuple[float, str]] = []
         self._default_ttl = default_ttl
         self._cleanup_task = None
+        # Clock used for expiry; an attribute so tests can substitute a fake one
+        self._now = time.monotonic
     
     def _generate_key(self, prefix: str, *args, **kwargs) -> str:
         """Generate a cache key from arguments."""
-        key_data = f"{prefix}:{args}:{kwargs}"
+        # Sorted so keyword argument order does not change the key
+        key_data = f"{prefix}:{args}:{sorted(kwargs.items())}"
         return hashlib.md5(key_data.encode()).hexdigest()
     
     def _is_expired(self, entry: Dict[str, Any]) -> bool:
         """Check if cache entry is expired."""
         if 'expires_at' not in entry:
             return True
-        return datetime.now() > entry['expires_at']
+        return self._now() > entry['expires_at']
     
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
         """Set a value in cache with TTL."""
         ttl = ttl or self._default_ttl
-        expires_at = datetime.now() + timedelta(seconds=ttl)
+        # Monotonic clock, so wall-clock adjustments do not shorten or extend TTLs
+        expires_at = self._now() + ttl
         
         try:
             # Serialize the value
@@ -45,6 +79,15 @@ class CacheManager:
                 'created_at': datetime.now(),
                 'access_count': 0
             }
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._max_entries:
+                evicted_key, _ = self._cache.popitem(last=False)
+                logger.debug(f"Cache evicted: {evicted_key}")
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+            self._expiry_heap = compact_expiry_heap(
+                self._expiry_heap, len(self._cache),
+                ((entry['expires_at'], cached_key) for cached_key, entry in self._cache.items())
+            )
             logger.debug(f"Cache set: {key} (TTL: {ttl}s)")
         except Exception as e:
             logger.error(f"Error caching value for key {key}: {e}")
@@ -62,7 +105,8 @@ class CacheManager:
             logger.debug(f"Cache expired: {key}")
             return default
         
-        # Update access count and timestamp
+        # Update recency, access count and timestamp
+        self._cache.move_to_end(key)
         entry['access_count'] += 1
         entry['last_accessed'] = datetime.now()
         
@@ -87,20 +131,23 @@ class CacheManager:
     def clear(self) -> None:
         """Clear all cache entries."""
         self._cache.clear()
+        self._expiry_heap.clear()
         logger.info("Cache cleared")
     
     def cleanup_expired(self) -> int:
         """Clean up expired cache entries."""
-        expired_keys = [
-            key for key, entry in self._cache.items()
-            if self._is_expired(entry)
-        ]
+        now = self._now()
+        removed = 0
+        while self._expiry_heap and self._expiry_heap[0][0] < now:
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            entry = self._cache.get(key)
+            # Skip heap items left behind by keys that were overwritten or deleted since
+            if entry is not None and entry['expires_at'] == expires_at:
+                del self._cache[key]
+                removed += 1
         
-        for key in expired_keys:
-            del self._cache[key]
-        
-        logger.debug(f"Cleaned up {len(expired_keys)} expired cache entries")
-        return len(expired_keys)
+        logger.debug(f"Cleaned up {removed} expired cache entries")
+        return removed
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
@@ -138,12 +185,21 @@ class CacheDecorator:
         self.key_prefix = key_prefix
     
     def __call__(self, func):
+        prefix = f"{self.key_prefix}{func.__name__}"
+        signature = inspect.signature(func)
+        
+        def make_key(args, kwargs) -> str:
+            """Key calls by bound parameter values, so f(1, y=2) and f(x=1, y=2) share an entry."""
+            try:
+                bound = signature.bind(*args, **kwargs)
+            except TypeError:
+                # Let the call itself raise the argument error
+                return self.cache_manager._generate_key(prefix, *args, **kwargs)
+            bound.apply_defaults()
+            return self.cache_manager._generate_key(prefix, tuple(bound.arguments.items()))
+        
         async def async_wrapper(*args, **kwargs):
-            cache_key = self.cache_manager._generate_key(
-                f"{self.key_prefix}{func.__name__}", 
-                *args, 
-                **kwargs
-            )
+            cache_key = make_key(args, kwargs)
             
             # Try to get from cache
             cached_result = self.cache_manager.get(cache_key)
@@ -160,11 +216,7 @@ class CacheDecorator:
             return result
         
         def sync_wrapper(*args, **kwargs):
-            cache_key = self.cache_manager._generate_key(
-                f"{self.key_prefix}{func.__name__}", 
-                *args, 
-                **kwargs
-            )
+            cache_key = make_key(args, kwargs)
             
             # Try to get from cache
             cached_result = self.cache_manager.get(cache_key)
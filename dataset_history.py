@@ -29,7 +29,7 @@ except ImportError:
 class DatasetHistory:
     """Manage dataset creation history"""
     
-    def __init__(self, history_file: str = "dataset_history.json", 
+    def __init__(self, history_file: str = "dataset_history.jsonl", 
                  mongodb_uri: Optional[str] = None, database_name: str = "text2dataset"):
         """Initialize dataset history manager"""
         self.history_file = history_file
@@ -41,6 +41,10 @@ class DatasetHistory:
         self.collection = None
         self.gridfs = None
         self.use_mongodb = False
+        # File-based history entries, kept in sync with the append-only file by _read_history_file()
+        self._entries: List[Dict] = []
+        self._inode = None
+        self._offset = 0
         
         # Try to connect to MongoDB if URI is provided
         if mongodb_uri and MONGO_AVAILABLE and MongoClient:
@@ -57,15 +61,87 @@ class DatasetHistory:
                 print(f"Failed to connect to MongoDB for history: {e}")
                 self.use_mongodb = False
                 self.ensure_history_dir()
+                self._migrate_legacy_history()
         else:
             self.use_mongodb = False
             self.ensure_history_dir()
+            self._migrate_legacy_history()
             
     def ensure_history_dir(self):
         """Ensure history directory exists"""
         if not os.path.exists(self.history_dir):
             os.makedirs(self.history_dir)
             
+    def _history_path(self) -> str:
+        """Path of the file-based history (one JSON entry per line)"""
+        return os.path.join(self.history_dir, self.history_file)
+    
+    def _write_history_file(self, history: List[Dict]):
+        """
+        Replace the file-based history with the given entries
+        
+        Args:
+            history (List[Dict]): Entries to write, oldest first
+        """
+        history_path = self._history_path()
+        tmp_path = history_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in history:
+                f.write(json.dumps(entry) + "\n")
+        # Atomic swap; other readers notice the new inode and reload
+        os.replace(tmp_path, history_path)
+        # Reload this instance's cache on the next read, even if the filesystem reuses the old inode number
+        self._entries, self._inode, self._offset = [], None, 0
+    
+    def _migrate_legacy_history(self):
+        """Convert a history saved as a single JSON array to the append-only format"""
+        history_path = self._history_path()
+        legacy_path = os.path.splitext(history_path)[0] + ".json"
+        if legacy_path == history_path or os.path.exists(history_path) or not os.path.exists(legacy_path):
+            return
+        try:
+            with open(legacy_path, 'r') as f:
+                history = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Could not migrate legacy history {legacy_path}: {e}")
+            return
+        self._write_history_file(history)
+        os.remove(legacy_path)
+        print(f"Migrated {len(history)} history entries to {history_path}")
+    
+    def _read_history_file(self) -> List[Dict]:
+        """
+        Bring the cached file-based history up to date, reading only lines appended since the last call
+        
+        Returns:
+            List[Dict]: Cached history entries, oldest first
+        """
+        history_path = self._history_path()
+        try:
+            stat = os.stat(history_path)
+        except FileNotFoundError:
+            self._entries, self._inode, self._offset = [], None, 0
+            return self._entries
+        
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            # The file was replaced (delete) or truncated, possibly by another worker: read it from the start
+            self._entries, self._inode, self._offset = [], stat.st_ino, 0
+        
+        if stat.st_size > self._offset:
+            with open(history_path, 'rb') as f:
+                f.seek(self._offset)
+                tail = f.read()
+            # Stop at the last newline so a line still being appended is read next time
+            end = tail.rfind(b"\n") + 1
+            for line in tail[:end].splitlines():
+                if line.strip():
+                    try:
+                        self._entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        print(f"Skipping corrupt history line: {line[:80]!r}")
+            self._offset += end
+        return self._entries
+    
     def add_to_history(self, filename: str, mode: str, format_type: str, entity_count: int = 0, file_content: Optional[bytes] = None):
         """
         Add a dataset to history
@@ -97,7 +173,7 @@ class DatasetHistory:
             print(f"Added to MongoDB history: {entry}")  # Debug line
         else:
             # Use file-based storage
-            entry["id"] = len(self.get_history()) + 1
+            entry["id"] = len(self._read_history_file()) + 1
             file_path = os.path.join("outputs", filename)
             entry["file_path"] = file_path
             
@@ -107,14 +183,9 @@ class DatasetHistory:
                 with open(file_path, "wb") as f:
                     f.write(file_content)
             
-            # Load existing history
-            history = self.get_history()
-            history.append(entry)
-            
-            # Save updated history
-            history_path = os.path.join(self.history_dir, self.history_file)
-            with open(history_path, 'w') as f:
-                json.dump(history, f, indent=2)
+            # Append the entry instead of rewriting the whole history
+            with open(self._history_path(), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
             print(f"Added to file history: {entry}")  # Debug line
             
     def get_history(self) -> List[Dict]:
@@ -145,17 +216,9 @@ class DatasetHistory:
                 return []
         else:
             # Use file-based storage
-            history_path = os.path.join(self.history_dir, self.history_file)
-            if os.path.exists(history_path):
-                try:
-                    with open(history_path, 'r') as f:
-                        data = json.load(f)
-                        print(f"Retrieved {len(data)} datasets from file")  # Debug line
-                        print(f"File datasets: {data}")  # Debug line
-                        return data
-                except (json.JSONDecodeError, FileNotFoundError):
-                    return []
-            return []
+            data = list(self._read_history_file())
+            print(f"Retrieved {len(data)} datasets from file")  # Debug line
+            return data
         
     def get_recent_datasets(self, limit: int = 10) -> List[Dict]:
         """
@@ -225,8 +288,7 @@ class DatasetHistory:
                 return {}
         else:
             # Use file-based storage
-            history = self.get_history()
-            for entry in history:
+            for entry in self._read_history_file():
                 if entry['id'] == dataset_id:
                     return entry
             return {}
@@ -305,9 +367,7 @@ class DatasetHistory:
             
             if len(history) < original_length:
                 # Save updated history
-                history_path = os.path.join(self.history_dir, self.history_file)
-                with open(history_path, 'w') as f:
-                    json.dump(history, f, indent=2)
+                self._write_history_file(history)
                 return True
             return False
         
@@ -320,10 +380,9 @@ class DatasetHistory:
             except Exception as e:
                 print(f"Error clearing history in MongoDB: {e}")
         else:
-            # Use file-based storage
-            history_path = os.path.join(self.history_dir, self.history_file)
-            if os.path.exists(history_path):
-                os.remove(history_path)
+            # Use file-based storage; an empty replacement file makes other workers drop their cache
+            if os.path.exists(self._history_path()):
+                self._write_history_file([])
                 
     def get_file_info(self, file_path: str) -> Dict:
         """
@@ -12,19 +12,60 @@ from transformers import (
 )
 from typing import List, Dict, Tuple, Optional, Any
 import logging
+import queue
 import re
-from collections import defaultdict
+import threading
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pre-compiled language detection patterns
+_SCRIPT_LANGUAGE_RES = [
+    (re.compile(r'[\u4e00-\u9fff]'), "zh"),  # Chinese
+    (re.compile(r'[\u3040-\u309f\u30a0-\u30ff]'), "ja"),  # Japanese
+    (re.compile(r'[\uac00-\ud7af]'), "ko"),  # Korean
+    (re.compile(r'[\u0600-\u06ff]'), "ar"),  # Arabic
+]
+_WORD_RE = re.compile(r'\b\w+\b')
+
+# Concepts the zero-shot classifier scores when extracting keyphrases
+_KEYPHRASE_CONCEPTS = [
+    "person", "organization", "location", "date", "time",
+    "money", "percentage", "product", "event", "law"
+]
+
+def _length_sorted_batches(texts: List[str], batch_size: int):
+    """
+    Yield batches of texts grouped by length to minimise padding.
+
+    Args:
+        texts (List[str]): Texts to batch
+        batch_size (int): Maximum number of texts per batch
+
+    Yields:
+        Tuple[List[int], List[str]]: Original positions and the texts of each batch
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    for start in range(0, len(order), batch_size):
+        positions = order[start:start + batch_size]
+        yield positions, [texts[i] for i in positions]
+
 class EnhancedNLPProcessor:
     """Enhanced NLP processor with transformer-based models for deeper text understanding."""
     
-    def __init__(self):
-        """Initialize the enhanced NLP processor with transformer models."""
+    def __init__(self, classifier_model_name: str = "valhalla/distilbart-mnli-12-3"):
+        """
+        Initialize the enhanced NLP processor with transformer models.
+        
+        Args:
+            classifier_model_name (str): Zero-shot classification model used for
+                categorization and keyphrase extraction
+        """
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.classifier_model_name = classifier_model_name
         logger.info(f"Using device: {self.device}")
         
         # Initialize models as None for lazy loading
@@ -37,6 +78,8 @@ class EnhancedNLPProcessor:
         
         # Flag to track if models failed to load
         self.models_failed = False
+        # Serializes model loading between request handlers and warmup()
+        self._load_lock = threading.Lock()
     
     def _load_ner_model(self) -> bool:
         """Load NER model lazily when needed."""
@@ -46,24 +89,31 @@ class EnhancedNLPProcessor:
         if self.models_failed:
             return False
             
-        try:
-            logger.info("Loading NER model...")
-            # Named Entity Recognition model
-            self.ner_tokenizer = AutoTokenizer.from_pretrained("dslim/bert-base-NER")
-            self.ner_model = AutoModelForTokenClassification.from_pretrained("dslim/bert-base-NER")
-            self.ner_pipeline = pipeline(
-                "ner", 
-                model=self.ner_model, 
-                tokenizer=self.ner_tokenizer,
-                aggregation_strategy="simple",
-                device=0 if self.device == "cuda" else -1
-            )
-            logger.info("NER model loaded successfully")
-            return True
-        except Exception as e:
-            logger.error(f"Error loading NER model: {e}")
-            self.models_failed = True
-            return False
+        with self._load_lock:
+            # Another thread may have finished loading while this one waited
+            if self.ner_pipeline is not None:
+                return True
+            if self.models_failed:
+                return False
+            
+            try:
+                logger.info("Loading NER model...")
+                # Named Entity Recognition model
+                self.ner_tokenizer = AutoTokenizer.from_pretrained("dslim/bert-base-NER")
+                self.ner_model = AutoModelForTokenClassification.from_pretrained("dslim/bert-base-NER")
+                self.ner_pipeline = pipeline(
+                    "ner", 
+                    model=self.ner_model, 
+                    tokenizer=self.ner_tokenizer,
+                    aggregation_strategy="simple",
+                    device=0 if self.device == "cuda" else -1
+                )
+                logger.info("NER model loaded successfully")
+                return True
+            except Exception as e:
+                logger.error(f"Error loading NER model: {e}")
+                self.models_failed = True
+                return False
     
     def _load_classifier_model(self) -> bool:
         """Load classifier model lazily when needed."""
@@ -73,23 +123,49 @@ class EnhancedNLPProcessor:
         if self.models_failed:
             return False
             
-        try:
-            logger.info("Loading classifier model...")
-            # Text classification model for better entity categorization
-            self.classifier_tokenizer = AutoTokenizer.from_pretrained("facebook/bart-large-mnli")
-            self.classifier_model = AutoModelForSequenceClassification.from_pretrained("facebook/bart-large-mnli")
-            self.classifier_pipeline = pipeline(
-                "zero-shot-classification",
-                model=self.classifier_model,
-                tokenizer=self.classifier_tokenizer,
-                device=0 if self.device == "cuda" else -1
-            )
-            logger.info("Classifier model loaded successfully")
-            return True
-        except Exception as e:
-            logger.error(f"Error loading classifier model: {e}")
-            self.models_failed = True
-            return False
+        with self._load_lock:
+            # Another thread may have finished loading while this one waited
+            if self.classifier_pipeline is not None:
+                return True
+            if self.models_failed:
+                return False
+            
+            try:
+                logger.info("Loading classifier model...")
+                # Text classification model for better entity categorization
+                self.classifier_tokenizer = AutoTokenizer.from_pretrained(self.classifier_model_name)
+                self.classifier_model = AutoModelForSequenceClassification.from_pretrained(self.classifier_model_name)
+                self.classifier_pipeline = pipeline(
+                    "zero-shot-classification",
+                    model=self.classifier_model,
+                    tokenizer=self.classifier_tokenizer,
+                    device=0 if self.device == "cuda" else -1
+                )
+                logger.info("Classifier model loaded successfully")
+                return True
+            except Exception as e:
+                logger.error(f"Error loading classifier model: {e}")
+                self.models_failed = True
+                return False
+    
+    def warmup(self) -> None:
+        """Preload the NER and classifier models so the first request does not pay for loading them."""
+        self._load_ner_model()
+        self._load_classifier_model()
+    
+    def _format_entities(self, text: str, entities: List[Dict]) -> List[Dict]:
+        """Convert raw NER pipeline output into entity dictionaries."""
+        formatted_entities = []
+        for entity in entities:
+            formatted_entities.append({
+                "text": text,
+                "entity": entity["word"],
+                "label": entity["entity_group"],
+                "confidence": entity["score"],
+                "start": entity["start"],
+                "end": entity["end"]
+            })
+        return formatted_entities
     
     def extract_entities_transformer(self, text: str) -> List[Dict]:
         """
@@ -107,24 +183,81 @@ class EnhancedNLPProcessor:
         try:
             # Process text with NER pipeline
             entities = self.ner_pipeline(text)
-            
-            # Format entities
-            formatted_entities = []
-            for entity in entities:
-                formatted_entities.append({
-                    "text": text,
-                    "entity": entity["word"],
-                    "label": entity["entity_group"],
-                    "confidence": entity["score"],
-                    "start": entity["start"],
-                    "end": entity["end"]
-                })
-            
-            return formatted_entities
+            return self._format_entities(text, entities)
         except Exception as e:
             logger.error(f"Error in transformer NER: {e}")
             return []
     
+    def extract_entities_transformer_batch(self, texts: List[str], batch_size: int = 32) -> List[List[Dict]]:
+        """
+        Extract named entities for many texts at once.
+        
+        Texts are sorted by length and fed to the NER pipeline in batches so
+        that each batch is padded only to its own longest sequence.
+        
+        Args:
+            texts (List[str]): Input texts
+            batch_size (int): Number of texts per forward pass
+            
+        Returns:
+            List[List[Dict]]: Entities for each input text, in input order
+        """
+        results: List[List[Dict]] = [[] for _ in texts]
+        if not texts or not self._load_ner_model() or self.ner_pipeline is None:
+            return results
+        
+        for positions, batch in _length_sorted_batches(texts, batch_size):
+            try:
+                outputs = self.ner_pipeline(batch, batch_size=len(batch))
+                batch_entities = [
+                    self._format_entities(text, entities) for text, entities in zip(batch, outputs)
+                ]
+            except Exception as e:
+                logger.error(f"Error in batched transformer NER, retrying texts one at a time: {e}")
+                batch_entities = [self.extract_entities_transformer(text) for text in batch]
+            for position, entities in zip(positions, batch_entities):
+                results[position] = entities
+        
+        return results
+    
+    def classify_texts(self, texts: List[str], candidate_labels: List[str], batch_size: int = 16) -> List[Dict]:
+        """
+        Classify many texts into categories using zero-shot classification.
+        
+        Texts are sent to the classifier in length-sorted batches rather than
+        one call per text.
+        
+        Args:
+            texts (List[str]): Input texts
+            candidate_labels (List[str]): Possible categories
+            batch_size (int): Number of texts per forward pass
+            
+        Returns:
+            List[Dict]: Classification result with labels and scores for each text, in input order
+        """
+        results = [
+            {"labels": candidate_labels, "scores": [0.0] * len(candidate_labels)}
+            for _ in texts
+        ]
+        if not texts or not self._load_classifier_model() or self.classifier_pipeline is None:
+            return results
+        
+        for positions, batch in _length_sorted_batches(texts, batch_size):
+            try:
+                outputs = self.classifier_pipeline(batch, candidate_labels, batch_size=len(batch))
+                if isinstance(outputs, dict):
+                    outputs = [outputs]
+                for position, output in zip(positions, outputs):
+                    results[position] = {
+                        "labels": output["labels"],
+                        "scores": output["scores"]
+                    }
+            except Exception as e:
+                # Later batches still run; only this batch keeps the zero-score defaults
+                logger.error(f"Error in text classification: {e}")
+        
+        return results
+    
     def classify_text_category(self, text: str, candidate_labels: List[str]) -> Dict:
         """
         Classify text into categories using zero-shot classification.
@@ -136,18 +269,7 @@ class EnhancedNLPProcessor:
         Returns:
             Dict: Classification result with labels and scores
         """
-        if not self._load_classifier_model() or self.classifier_pipeline is None:
-            return {"labels": candidate_labels, "scores": [0.0] * len(candidate_labels)}
-        
-        try:
-            result = self.classifier_pipeline(text, candidate_labels)
-            return {
-                "labels": result["labels"],
-                "scores": result["scores"]
-            }
-        except Exception as e:
-            logger.error(f"Error in text classification: {e}")
-            return {"labels": candidate_labels, "scores": [0.0] * len(candidate_labels)}
+        return self.classify_texts([text], candidate_labels)[0]
     
     def extract_keyphrases(self, text: str, top_k: int = 5) -> List[str]:
         """
@@ -160,26 +282,35 @@ class EnhancedNLPProcessor:
         Returns:
             List[str]: List of keyphrases
         """
+        return self.extract_keyphrases_batch([text], top_k)[0]
+    
+    def extract_keyphrases_batch(self, texts: List[str], top_k: int = 5) -> List[List[str]]:
+        """
+        Extract keyphrases for many texts with one batched classification.
+        
+        Args:
+            texts (List[str]): Input texts
+            top_k (int): Number of keyphrases to extract per text
+            
+        Returns:
+            List[List[str]]: Keyphrases for each input text, in input order
+        """
         try:
             # Use the classifier to identify important concepts
-            concepts = [
-                "person", "organization", "location", "date", "time", 
-                "money", "percentage", "product", "event", "law"
-            ]
-            
-            # Classify the text to get relevant concepts
-            result = self.classify_text_category(text, concepts)
+            results = self.classify_texts(texts, _KEYPHRASE_CONCEPTS)
             
             # Extract top concepts as keyphrases
-            keyphrases = []
-            for i, (label, score) in enumerate(zip(result["labels"], result["scores"])):
-                if score > 0.1 and i < top_k:  # Threshold for relevance
-                    keyphrases.append(label)
-            
-            return keyphrases
+            return [
+                [
+                    label
+                    for i, (label, score) in enumerate(zip(result["labels"], result["scores"]))
+                    if score > 0.1 and i < top_k  # Threshold for relevance
+                ]
+                for result in results
+            ]
         except Exception as e:
             logger.error(f"Error in keyphrase extraction: {e}")
-            return []
+            return [[] for _ in texts]
     
     def get_text_embeddings(self, texts: List[str]) -> torch.Tensor:
         """
@@ -203,9 +334,16 @@ class EnhancedNLPProcessor:
 class MultiLanguageProcessor:
     """Multi-language NLP processor supporting various languages."""
     
-    def __init__(self):
-        """Initialize multi-language processor."""
+    def __init__(self, max_loaded_models: Optional[int] = None):
+        """
+        Initialize multi-language processor.
+        
+        Args:
+            max_loaded_models (Optional[int]): Maximum number of translation models
+                kept in memory (defaults to 4 on GPU, 8 on CPU)
+        """
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.max_loaded_models = max_loaded_models or (4 if self.device == "cuda" else 8)
         self.supported_languages = {
             "en": "English",
             "es": "Spanish", 
@@ -222,11 +360,31 @@ class MultiLanguageProcessor:
         
         # Initialize translation models as None for lazy loading
         self.translation_models: Dict[str, Tuple[str, Optional[Any], Optional[Any]]] = {}
-        self.loaded_models: Dict[str, Tuple[Any, Any]] = {}
+        # Least recently used models are evicted first
+        self.loaded_models: "OrderedDict[str, Tuple[Any, Any]]" = OrderedDict()
+        # Guards the model pool between request handlers and warmup()
+        self._load_lock = threading.Lock()
+    
+    def _evict_translation_model(self, model_key: str) -> None:
+        """Release a loaded translation model. Call with _load_lock held."""
+        # Only drop the pool's references: a thread still translating with the model keeps
+        # it usable, and its memory is freed once that thread is done with it
+        self.loaded_models.pop(model_key)
+        model_name = self.translation_models[model_key][0]
+        self.translation_models[model_key] = (model_name, None, None)
+        if self.device == "cuda":
+            torch.cuda.empty_cache()
+        logger.info(f"Evicted translation model {model_name}")
     
     def _load_translation_model(self, model_key: str) -> Optional[Tuple[Any, Any]]:
         """Load translation model lazily when needed."""
+        with self._load_lock:
+            return self._load_translation_model_locked(model_key)
+    
+    def _load_translation_model_locked(self, model_key: str) -> Optional[Tuple[Any, Any]]:
+        """Look up, load and evict translation models. Call with _load_lock held."""
         if model_key in self.loaded_models:
+            self.loaded_models.move_to_end(model_key)
             return self.loaded_models[model_key]
             
         try:
@@ -254,16 +412,29 @@ class MultiLanguageProcessor:
             if tokenizer is None or model is None:
                 logger.info(f"Loading translation model {model_name}...")
                 tokenizer = MarianTokenizer.from_pretrained(model_name)
-                model = MarianMTModel.from_pretrained(model_name)
+                model = MarianMTModel.from_pretrained(model_name).to(self.device)
                 self.translation_models[model_key] = (model_name, tokenizer, model)
                 self.loaded_models[model_key] = (tokenizer, model)
                 logger.info(f"Translation model {model_name} loaded successfully")
+                
+                while len(self.loaded_models) > self.max_loaded_models:
+                    self._evict_translation_model(next(iter(self.loaded_models)))
             
             return (tokenizer, model)
         except Exception as e:
             logger.error(f"Error loading translation model {model_key}: {e}")
             return None
     
+    def warmup(self, pairs: Tuple[str, ...] = ("en-es", "es-en", "en-fr", "fr-en")) -> None:
+        """
+        Preload translation models for common language pairs.
+        
+        Args:
+            pairs (Tuple[str, ...]): Language pairs to load, e.g. "en-es"
+        """
+        for model_key in pairs:
+            self._load_translation_model(model_key)
+    
     def detect_language(self, text: str) -> str:
         """
         Detect language of text (simplified implementation).
@@ -280,21 +451,16 @@ class MultiLanguageProcessor:
             text = text.lower()
             
             # Character-based detection
-            if re.search(r'[\u4e00-\u9fff]', text):
-                return "zh"  # Chinese
-            elif re.search(r'[\u3040-\u309f\u30a0-\u30ff]', text):
-                return "ja"  # Japanese
-            elif re.search(r'[\uac00-\ud7af]', text):
-                return "ko"  # Korean
-            elif re.search(r'[\u0600-\u06ff]', text):
-                return "ar"  # Arabic
+            for pattern, language in _SCRIPT_LANGUAGE_RES:
+                if pattern.search(text):
+                    return language
             
             # Word-based detection for European languages
             spanish_words = {"el", "la", "de", "que", "y", "a", "en", "un", "es", "se"}
             french_words = {"le", "la", "de", "et", "est", "en", "un", "que", "je", "il"}
             german_words = {"der", "die", "und", "in", "den", "von", "zu", "das", "mit", "ist"}
             
-            words = set(re.findall(r'\b\w+\b', text.lower()))
+            words = set(_WORD_RE.findall(text))
             
             spanish_count = len(words.intersection(spanish_words))
             french_count = len(words.intersection(french_words))
@@ -336,7 +502,7 @@ class MultiLanguageProcessor:
             tokenizer, model = model_components
             
             # Translate
-            inputs = tokenizer(text, return_tensors="pt", padding=True)
+            inputs = tokenizer(text, return_tensors="pt", padding=True).to(self.device)
             translated = model.generate(**inputs)
             result = tokenizer.decode(translated[0], skip_special_tokens=True)
             
@@ -344,41 +510,128 @@ class MultiLanguageProcessor:
         except Exception as e:
             logger.error(f"Error in text translation: {e}")
             return text
+    
+    def translate_texts(self, texts: List[str], source_lang: str, target_lang: str,
+                        batch_size: int = 16) -> List[str]:
+        """
+        Translate many texts between languages.
+        
+        Texts are grouped by length before tokenization so each batch is
+        padded only to its own longest sequence.
+        
+        Args:
+            texts (List[str]): Texts to translate
+            source_lang (str): Source language code
+            target_lang (str): Target language code
+            batch_size (int): Number of texts per generate call
+            
+        Returns:
+            List[str]: Translated texts, in input order
+        """
+        model_key = f"{source_lang}-{target_lang}"
+        
+        model_components = self._load_translation_model(model_key)
+        if model_components is None:
+            logger.warning(f"Could not load translation model for {model_key}")
+            return list(texts)
+        
+        tokenizer, model = model_components
+        results = list(texts)
+        
+        for positions, batch in _length_sorted_batches(texts, batch_size):
+            try:
+                inputs = tokenizer(batch, return_tensors="pt", padding="longest").to(self.device)
+                translated = model.generate(**inputs)
+                decoded = tokenizer.batch_decode(translated, skip_special_tokens=True)
+            except Exception as e:
+                logger.error(f"Error in batched text translation, retrying texts one at a time: {e}")
+                decoded = [self.translate_text(text, source_lang, target_lang) for text in batch]
+            for position, result in zip(positions, decoded):
+                results[position] = result
+        
+        return results
 
 # Global instances (lazy loading - models won't be loaded until first use)
 enhanced_nlp_processor = EnhancedNLPProcessor()
 multi_language_processor = MultiLanguageProcessor()
 
-def process_text_enhanced(sentences: List[str]) -> List[Dict]:
+def process_text_enhanced(sentences: List[str], chunk_size: int = 128) -> List[Dict]:
     """
     Process text with enhanced NLP for deeper understanding.
     
+    NER runs on a background thread while keyphrases are extracted for the
+    previous chunk on the calling thread, so the two models overlap.
+    
     Args:
         sentences (List[str]): List of sentences to process
+        chunk_size (int): Number of sentences handed from NER to classification at a time
         
     Returns:
         List[Dict]: Enhanced entity extraction results
     """
     results = []
     
-    for sentence in sentences:
-        if not sentence.strip():
-            continue
-            
-        # Extract entities using transformer model
-        entities = enhanced_nlp_processor.extract_entities_transformer(sentence)
+    sentences = [sentence for sentence in sentences if sentence.strip()]
+    entity_queue: "queue.Queue[Optional[List[Tuple[str, List[Dict]]]]]" = queue.Queue(maxsize=2)
+    # Set when the consumer stops reading, so the producer never blocks on a full queue
+    stop = threading.Event()
+    
+    def put_unless_stopped(item) -> bool:
+        while not stop.is_set():
+            try:
+                entity_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce_entities():
+        try:
+            for start in range(0, len(sentences), chunk_size):
+                if stop.is_set():
+                    return
+                chunk = sentences[start:start + chunk_size]
+                # Extract entities using transformer model, batched by sentence length
+                batched_entities = enhanced_nlp_processor.extract_entities_transformer_batch(chunk)
+                if not put_unless_stopped(list(zip(chunk, batched_entities))):
+                    return
+        finally:
+            put_unless_stopped(None)
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        producer = executor.submit(produce_entities)
         
-        # Add confidence scores and better categorization
-        for entity in entities:
-            # Add keyphrase context
-            keyphrases = enhanced_nlp_processor.extract_keyphrases(sentence)
-            entity["keyphrases"] = keyphrases
-            
-            # Add text embedding for similarity comparisons
-            # (simplified - in practice you would store embeddings for later use)
-            entity["embedding_available"] = True
-            
-        results.extend(entities)
+        try:
+            while True:
+                chunk = entity_queue.get()
+                if chunk is None:
+                    break
+                
+                chunk = [(sentence, entities) for sentence, entities in chunk if entities]
+                
+                # Add keyphrase context, classifying the whole chunk in batches
+                chunk_keyphrases = enhanced_nlp_processor.extract_keyphrases_batch(
+                    [sentence for sentence, _ in chunk]
+                )
+                for (sentence, entities), keyphrases in zip(chunk, chunk_keyphrases):
+                    for entity in entities:
+                        entity["keyphrases"] = keyphrases
+                        
+                        # Add text embedding for similarity comparisons
+                        # (simplified - in practice you would store embeddings for later use)
+                        entity["embedding_available"] = True
+                    
+                    results.extend(entities)
+        finally:
+            stop.set()
+            # Drain anything queued so the producer can finish before the executor shuts down
+            while True:
+                try:
+                    entity_queue.get_nowait()
+                except queue.Empty:
+                    break
+        
+        producer.result()
     
     return results
 
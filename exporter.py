@@ -1,6 +1,33 @@
 import pandas as pd
-from typing import Union
+from typing import Any, Union
 import io
+import json
+
+# Fast JSON serializer (optional)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def dumps_json(data: Any) -> str:
+    """
+    Serialize data as UTF-8 JSON indented by two spaces
+    
+    Args:
+        data (Any): JSON-serializable data
+        
+    Returns:
+        str: Equivalent of json.dumps(data, ensure_ascii=False, indent=2), except that with
+        orjson installed NaN and infinite floats are written as null instead of NaN/Infinity
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode('utf-8')
+        except TypeError:
+            # Non-string keys and other types orjson rejects (it never raises on NaN)
+            pass
+    return json.dumps(data, ensure_ascii=False, indent=2)
 
 def export_to_csv(df: pd.DataFrame, filename: Union[str, io.StringIO]) -> None:
     """
@@ -0,0 +1,419 @@
+"""
+Shared text normalization, entity filtering and regex fallback extraction for Fast and Smart modes
+"""
+
+from typing import List, Dict, Tuple, Iterator, Optional
+from functools import lru_cache
+import logging
+import os
+import re
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# Pre-compiled regex patterns
+_WS_RE = re.compile(r'\s+')
+_NUM_SYM_RE = re.compile(r'^[0-9\W]+$')
+_HOURLY_RATE_RE = re.compile(r'[£$€¥][0-9,.]+\s*(?:an\s+hour|per\s+hour|hour)')
+# Date patterns, combined so each sentence is scanned once
+_DATE_RE = re.compile(
+    r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b'
+    r'|\b\d{4}\b'
+    r'|\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{1,2},? \d{4}\b',
+    re.IGNORECASE
+)
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+_PHONE_RE = re.compile(r'(?:\+?1[-.\s]?)?\(?[0-9]{3}\)?[-.\s]?[0-9]{3}[-.\s]?[0-9]{4}')
+# Money/currency patterns (enhanced to catch time-like MONEY entities)
+_MONEY_RE = re.compile(
+    r'[£$€¥][0-9,]+(?:\.[0-9]{2})?\s*(?:an\s+hour|per\s+hour|hour)'  # Hourly rates (must come first)
+    r'|[$£€¥][0-9,]+(?:\.[0-9]{2})?'
+    r'|[0-9,]+(?:\.[0-9]{2})?\s*(?:dollars|USD|pounds|GBP|euros|EUR|yen|JPY)',
+    re.IGNORECASE
+)
+
+# spaCy components not needed for NER, excluded when loading the model
+SPACY_EXCLUDE = ["tagger", "parser", "lemmatizer", "attribute_ruler"]
+# Sentences per nlp.pipe batch
+NER_BATCH_SIZE = int(os.getenv("TEXT2DATASET_NER_BATCH_SIZE", "64"))
+# Worker processes for spaCy's nlp.pipe (-1 uses every CPU); 1 keeps NER in-process
+NER_N_PROCESS = int(os.getenv("TEXT2DATASET_N_PROCESS", "1"))
+# Smaller inputs always run in-process because worker start-up would dominate
+_MIN_SENTENCES_PER_NER_PROCESS = 100
+
+# Entity filtering data used by is_meaningful_entity
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
+    'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did',
+    'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can'
+})
+_CURRENCY_SYMBOLS = frozenset('$£€¥')
+_CURRENCY_WORDS = ('dollar', 'pound', 'euro', 'yen', 'usd', 'gbp', 'eur', 'jpy')
+_AMBIGUOUS_PHRASES = (
+    'the end of', 'the beginning of', 'the start of', 'the middle of',
+    'end of', 'beginning of', 'start of', 'middle of',
+    'a period', 'the period', 'period of'
+)
+
+# UTF-8 characters misdecoded as Latin-1, repaired by clean_text
+_MOJIBAKE = {
+    'Â£': '£',   # British pound
+    'Â€': '€',   # Euro
+    'Â¥': '¥',   # Yen
+    'Â¢': '¢',   # Cent
+    'Â¤': '¤',   # Currency sign
+    'Â§': '§',   # Section sign
+    'Â¶': '¶',   # Paragraph sign
+    'Â°': '°',   # Degree symbol
+    'Â±': '±',   # Plus-minus sign
+    'Â¼': '¼',   # Fraction one quarter
+    'Â½': '½',   # Fraction one half
+    'Â¾': '¾',   # Fraction three quarters
+    'Â×': '×',   # Multiplication sign
+    'Â÷': '÷',   # Division sign
+    'Ã©': 'é',   # e acute
+    'Ã¨': 'è',   # e grave
+    'Ãª': 'ê',   # e circumflex
+    'Ã«': 'ë',   # e diaeresis
+    'Ã¡': 'á',   # a acute
+    'Ã¢': 'â',   # a circumflex
+    'Ã£': 'ã',   # a tilde
+    'Ã¤': 'ä',   # a diaeresis
+    'Ã±': 'ñ',   # n tilde
+}
+_MOJIBAKE_RE = re.compile('|'.join(map(re.escape, _MOJIBAKE)))
+
+# Single-character normalizations applied by clean_text
+_NORMALIZE_TABLE = str.maketrans({
+    '\u201c': '"', '\u201d': '"', '\u201e': '"',  # Smart and low-9 double quotes
+    '\u2018': "'", '\u2019': "'", '\u201a': "'",  # Smart and low-9 single quotes
+    '\u2013': '-', '\u2014': '-',                  # En dash and em dash
+    '\u00a0': ' ',                                  # Non-breaking space
+    '\u2026': '...',                                # Horizontal ellipsis
+})
+
+def _fix_mojibake(match: re.Match) -> str:
+    """Return the repaired character for a misdecoded UTF-8 sequence."""
+    return _MOJIBAKE[match.group()]
+
+def _clean_text(text: str) -> str:
+    """
+    Clean text by normalizing UTF-8 symbols and removing extra whitespace
+    
+    Args:
+        text (str): Text to clean
+        
+    Returns:
+        str: Cleaned text
+    """
+    if not text:
+        return ""
+    
+    # Fix UTF-8 encoding issues (Â£ -> £, Ã© -> é) in a single pass
+    # This handles cases where UTF-8 encoded characters are misinterpreted
+    if 'Â' in text or 'Ã' in text:
+        text = _MOJIBAKE_RE.sub(_fix_mojibake, text)
+    
+    # Compose decomposed sequences (NFC, not NFKC, which would rewrite ² and ½)
+    if not unicodedata.is_normalized('NFC', text):
+        text = unicodedata.normalize('NFC', text)
+    
+    # Normalize common UTF-8 symbols in a single pass
+    text = text.translate(_NORMALIZE_TABLE)
+    
+    # Remove extra whitespace
+    text = _WS_RE.sub(' ', text)
+    return text.strip()
+
+# Only entity-sized strings are memoized; sentences of any length go through _clean_text
+@lru_cache(maxsize=65536)
+def clean_text(text: str) -> str:
+    """
+    Clean an entity string, memoizing the result for repeated entities
+    
+    Args:
+        text (str): Text to clean
+        
+    Returns:
+        str: Cleaned text
+    """
+    return _clean_text(text)
+
+def _punct_count(text: str) -> int:
+    """Count characters that are neither word characters nor whitespace."""
+    return sum(1 for c in text if not (c.isalnum() or c == '_' or c.isspace()))
+
+@lru_cache(maxsize=65536)
+def is_meaningful_entity(entity_text: str, label: str) -> bool:
+    """
+    Check if an entity is meaningful and not ambiguous
+    
+    Args:
+        entity_text (str): The entity text
+        label (str): The entity label
+        
+    Returns:
+        bool: True if entity is meaningful
+    """
+    # Remove empty or whitespace-only entities
+    stripped = entity_text.strip() if entity_text else ""
+    if not stripped:
+        return False
+    
+    # Remove single character entities (except currency symbols for MONEY entities)
+    if len(stripped) == 1:
+        return label == "MONEY" and stripped in _CURRENCY_SYMBOLS
+    
+    # Remove entities that are just numbers or symbols
+    if _NUM_SYM_RE.match(stripped):
+        # Allow MONEY entities that contain currency symbols
+        return label == "MONEY" and not _CURRENCY_SYMBOLS.isdisjoint(entity_text)
+    
+    lower = entity_text.lower()
+    
+    # Remove entities that are common stop words
+    if lower in _STOP_WORDS:
+        return False
+    
+    # Remove entities with excessive punctuation (plain words and numbers have none,
+    # which str.isalnum can confirm without counting character by character)
+    if not entity_text.replace(' ', '').isalnum() and _punct_count(entity_text) * 2 > len(entity_text):
+        return False
+    
+    # For MONEY entities, ensure they contain currency information
+    if label == "MONEY":
+        # Must contain at least one currency symbol or currency word
+        has_symbol = not _CURRENCY_SYMBOLS.isdisjoint(entity_text)
+        if not has_symbol and not any(word in lower for word in _CURRENCY_WORDS):
+            return False
+    
+    # Special handling for time-like MONEY entities (e.g., "£5.60 an hour")
+    if label == "TIME" and _HOURLY_RATE_RE.search(lower):
+        return False  # Let the MONEY regex pattern catch these instead
+    
+    # Filter out ambiguous phrases like "the end of"
+    if any(phrase in lower for phrase in _AMBIGUOUS_PHRASES):
+        return False
+    
+    return True
+
+def extract_entities_fallback(sentence: str) -> List[Dict]:
+    """
+    Fallback method for entity extraction using regex patterns
+    
+    Args:
+        sentence (str): Sentence to process
+        
+    Returns:
+        List[Dict]: List of extracted entities
+    """
+    # Clean the sentence first to fix encoding issues
+    sentence = _clean_text(sentence)
+    
+    entities = []
+    
+    # Pattern for dates
+    for match in _DATE_RE.finditer(sentence):
+        clean_match = clean_text(match.group())
+        if is_meaningful_entity(clean_match, "DATE"):
+            entities.append({
+                "text": sentence,
+                "entity": clean_match,
+                "label": "DATE",
+                "start": match.start(),
+                "end": match.end()
+            })
+    
+    # Pattern for emails
+    for match in _EMAIL_RE.finditer(sentence):
+        clean_email = clean_text(match.group())
+        if is_meaningful_entity(clean_email, "EMAIL"):
+            entities.append({
+                "text": sentence,
+                "entity": clean_email,
+                "label": "EMAIL",
+                "start": match.start(),
+                "end": match.end()
+            })
+    
+    # Pattern for phone numbers
+    for match in _PHONE_RE.finditer(sentence):
+        clean_phone = clean_text(match.group())
+        if is_meaningful_entity(clean_phone, "PHONE"):
+            entities.append({
+                "text": sentence,
+                "entity": clean_phone,
+                "label": "PHONE",
+                "start": match.start(),
+                "end": match.end()
+            })
+    
+    # Pattern for money/currency
+    for match in _MONEY_RE.finditer(sentence):
+        clean_match = clean_text(match.group())
+        if is_meaningful_entity(clean_match, "MONEY"):
+            entities.append({
+                "text": sentence,
+                "entity": clean_match,
+                "label": "MONEY",
+                "start": match.start(),
+                "end": match.end()
+            })
+    
+    return entities
+
+@lru_cache(maxsize=None)
+def load_spacy_model(name: str = "en_core_web_sm"):
+    """
+    Load a spaCy model for NER once per process, shared by Fast and Smart modes
+    
+    Args:
+        name (str): Installed spaCy model package
+        
+    Returns:
+        spacy.language.Language: Loaded model without the components NER does not need
+        
+    Raises:
+        OSError: If the model is not installed (failures are not cached)
+    """
+    import spacy
+    nlp = spacy.load(name, exclude=SPACY_EXCLUDE)
+    logger.info(f"spaCy model {name} loaded with pipes: {nlp.pipe_names}")
+    return nlp
+
+# Set once the default model has failed to load, so Fast and Smart modes stop retrying
+_spacy_model_missing = False
+
+def get_spacy_model():
+    """
+    Load the shared spaCy model the first time it is needed
+    
+    Returns:
+        spacy.language.Language: Loaded model, or None if it is not installed
+    """
+    global _spacy_model_missing
+    if _spacy_model_missing:
+        return None
+    
+    try:
+        return load_spacy_model()
+    except OSError:
+        # If model is not installed, callers use the regex fallback approach
+        _spacy_model_missing = True
+        logger.warning("spaCy model 'en_core_web_sm' not found. Please install it with: python -m spacy download en_core_web_sm")
+        return None
+
+def ner_n_process(num_sentences: int, n_process: Optional[int] = None) -> int:
+    """
+    Choose the number of worker processes for running NER over sentences
+    
+    Args:
+        num_sentences (int): Number of sentences to process
+        n_process (Optional[int]): Requested worker count, defaults to TEXT2DATASET_N_PROCESS
+        
+    Returns:
+        int: n_process value for nlp.pipe
+    """
+    if num_sentences < _MIN_SENTENCES_PER_NER_PROCESS:
+        return 1
+    return NER_N_PROCESS if n_process is None else n_process
+
+def _doc_entities(doc, sentence: str) -> List[Dict]:
+    """
+    Collect the meaningful entities from a processed spaCy Doc
+    
+    Args:
+        doc: spaCy Doc for the sentence
+        sentence (str): Sentence the Doc was made from
+        
+    Returns:
+        List[Dict]: Entities with their character offsets in the sentence
+    """
+    entities = []
+    for ent in doc.ents:
+        # Span.text is rebuilt from the tokens on every access, so read it once
+        entity_text = ent.text.strip()
+        
+        # Skip empty or whitespace-only entities
+        if not entity_text:
+            continue
+            
+        # Fix MONEY labels and clean UTF-8 symbols
+        label = ent.label_
+        
+        # Handle MONEY entities specifically
+        if label == "MONEY":
+            # Remove extra whitespace
+            entity_text = _WS_RE.sub(' ', entity_text)
+        
+        # Clean UTF-8 symbols and normalize text
+        entity_text = clean_text(entity_text)
+        
+        # Skip ambiguous or meaningless entity spans
+        if is_meaningful_entity(entity_text, label):
+            entities.append({
+                "text": sentence,
+                "entity": entity_text,
+                "label": label,
+                "start": ent.start_char,
+                "end": ent.end_char
+            })
+    return entities
+
+def ner_entities(nlp, sentences: List[str], n_process: Optional[int] = None) -> Iterator[Tuple[str, List[Dict], Optional[Exception]]]:
+    """
+    Run spaCy NER over sentences in batches with nlp.pipe
+    
+    Components may raise for a whole batch at once, so when a batch fails its
+    sentences are run one at a time with nlp(sentence) and only the ones that
+    still raise are reported with their error. The pipe then resumes after
+    the failed batch.
+    
+    Args:
+        nlp: Loaded spaCy model
+        sentences (List[str]): Non-empty sentences to process
+        n_process (Optional[int]): Worker processes for nlp.pipe, see ner_n_process
+        
+    Yields:
+        Tuple[str, List[Dict], Optional[Exception]]: Sentence, its entities and
+        the error raised while processing it (if any)
+    """
+    position = 0
+    while position < len(sentences):
+        try:
+            remaining = sentences[position:]
+            for doc in nlp.pipe(remaining, batch_size=NER_BATCH_SIZE, n_process=ner_n_process(len(remaining), n_process)):
+                sentence = sentences[position]
+                position += 1
+                yield sentence, _doc_entities(doc, sentence), None
+        except Exception:
+            # Every earlier batch was yielded in full, so the failed batch starts at position
+            for sentence in sentences[position:position + NER_BATCH_SIZE]:
+                try:
+                    entities = _doc_entities(nlp(sentence), sentence)
+                except Exception as e:
+                    yield sentence, [], e
+                else:
+                    yield sentence, entities, None
+            position += NER_BATCH_SIZE
+
+def drop_overlapping_spans(spans: List[Tuple[int, int, str]]) -> List[Tuple[int, int, str]]:
+    """
+    Remove overlapping entity spans, which spaCy rejects in training data
+    
+    Spans are taken in order of start offset, longest first, and any span
+    overlapping an already accepted one is dropped.
+    
+    Args:
+        spans (List[Tuple[int, int, str]]): (start, end, label) spans
+        
+    Returns:
+        List[Tuple[int, int, str]]: Non-overlapping spans sorted by start offset
+    """
+    kept = []
+    last_end = -1
+    for start, end, label in sorted(spans, key=lambda span: (span[0], span[0] - span[1])):
+        if start >= last_end:
+            kept.append((start, end, label))
+            last_end = end
+    return kept
@@ -2,22 +2,55 @@
 Smart Mode for Text2Dataset - Lightweight version
 """
 
-from typing import List, Dict, Tuple
-import spacy
+from typing import List, Dict, Tuple, Iterator, Optional
 import logging
 import re
+from collections import defaultdict
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+from labeling_common import (
+    clean_text, drop_overlapping_spans, extract_entities_fallback, get_spacy_model, is_meaningful_entity,
+    ner_entities
+)
 
-# Try to load spaCy model for additional entity recognition
+# Aho-Corasick matcher for category keywords (optional)
 try:
-    nlp = spacy.load("en_core_web_sm")
-    logger.info("spaCy model loaded successfully")
-except OSError:
-    nlp = None
-    logger.warning("spaCy model not found. Install with: python -m spacy download en_core_web_sm")
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    ahocorasick = None
+    AHOCORASICK_AVAILABLE = False
+
+# Set up logging (handlers and levels are configured by the caller)
+logger = logging.getLogger(__name__)
+
+# Category keywords in priority order: the first category with a matching keyword wins
+_CATEGORY_KEYWORDS = [
+    ("CATEGORY_TECHNOLOGY", ['tech', 'computer', 'software', 'digital', 'internet', 'app', 'ai', 'artificial']),
+    ("CATEGORY_SPORTS", ['sport', 'game', 'football', 'basketball', 'tennis', 'olympic', 'championship']),
+    ("CATEGORY_POLITICS", ['politic', 'government', 'election', 'president', 'minister', 'senator', 'congress']),
+    ("CATEGORY_BUSINESS", ['business', 'market', 'economy', 'stock', 'finance', 'company', 'corporation']),
+    ("CATEGORY_HEALTH", ['health', 'medical', 'doctor', 'hospital', 'disease', 'treatment']),
+    ("CATEGORY_ENTERTAINMENT", ['entertain', 'movie', 'film', 'actor', 'celebrity', 'music', 'concert']),
+]
+_KEYWORD_PRIORITY = {
+    keyword: priority
+    for priority, (_, keywords) in enumerate(_CATEGORY_KEYWORDS)
+    for keyword in keywords
+}
+
+# Match all category keywords in a single pass over the text
+if AHOCORASICK_AVAILABLE:
+    _CATEGORY_AUTOMATON = ahocorasick.Automaton()
+    for _keyword, _priority in _KEYWORD_PRIORITY.items():
+        _CATEGORY_AUTOMATON.add_word(_keyword, _priority)
+    _CATEGORY_AUTOMATON.make_automaton()
+else:
+    _CATEGORY_AUTOMATON = None
+# Without the automaton, one keyword union per category is searched in priority order
+_CATEGORY_RES = [
+    (category, re.compile('|'.join(map(re.escape, keywords))))
+    for category, keywords in _CATEGORY_KEYWORDS
+]
 
 # Simple category classification without heavy models
 def classify_category(text: str) -> str:
@@ -33,304 +66,140 @@ def classify_category(text: str) -> str:
     text_lower = text.lower()
     
     # Simple keyword-based classification
-    if any(word in text_lower for word in ['tech', 'computer', 'software', 'digital', 'internet', 'app', 'ai', 'artificial']):
-        return "CATEGORY_TECHNOLOGY"
-    elif any(word in text_lower for word in ['sport', 'game', 'football', 'basketball', 'tennis', 'olympic', 'championship']):
-        return "CATEGORY_SPORTS"
-    elif any(word in text_lower for word in ['politic', 'government', 'election', 'president', 'minister', 'senator', 'congress']):
-        return "CATEGORY_POLITICS"
-    elif any(word in text_lower for word in ['business', 'market', 'economy', 'stock', 'finance', 'company', 'corporation']):
-        return "CATEGORY_BUSINESS"
-    elif any(word in text_lower for word in ['health', 'medical', 'doctor', 'hospital', 'disease', 'treatment']):
-        return "CATEGORY_HEALTH"
-    elif any(word in text_lower for word in ['entertain', 'movie', 'film', 'actor', 'celebrity', 'music', 'concert']):
-        return "CATEGORY_ENTERTAINMENT"
-    else:
+    if _CATEGORY_AUTOMATON is None:
+        for category, pattern in _CATEGORY_RES:
+            if pattern.search(text_lower):
+                return category
         return "CATEGORY_GENERAL"
-
-def clean_text(text: str) -> str:
-    """
-    Clean text by normalizing UTF-8 symbols and removing extra whitespace
-    
-    Args:
-        text (str): Text to clean
-        
-    Returns:
-        str: Cleaned text
-    """
-    if not text:
-        return ""
-    
-    # Fix UTF-8 encoding issues (Â£ -> £ and other Â prefixed characters)
-    # This handles cases where UTF-8 encoded characters are misinterpreted
-    text = text.replace('Â£', '£')   # British pound
-    text = text.replace('Â€', '€')   # Euro
-    text = text.replace('Â¥', '¥')   # Yen
-    text = text.replace('Â¢', '¢')   # Cent
-    text = text.replace('Â¤', '¤')   # Currency sign
-    text = text.replace('Â§', '§')   # Section sign
-    text = text.replace('Â¶', '¶')   # Paragraph sign
-    text = text.replace('Â°', '°')   # Degree symbol
-    text = text.replace('Â±', '±')   # Plus-minus sign
-    text = text.replace('Â¼', '¼')   # Fraction one quarter
-    text = text.replace('Â½', '½')   # Fraction one half
-    text = text.replace('Â¾', '¾')   # Fraction three quarters
-    text = text.replace('Â×', '×')   # Multiplication sign
-    text = text.replace('Â÷', '÷')   # Division sign
-    
-    # Handle other common encoding issues
-    text = text.replace('Ã©', 'é')   # e acute
-    text = text.replace('Ã¨', 'è')   # e grave
-    text = text.replace('Ãª', 'ê')   # e circumflex
-    text = text.replace('Ã«', 'ë')   # e diaeresis
-    text = text.replace('Ã¡', 'á')   # a acute
-    text = text.replace('Ã¢', 'â')   # a circumflex
-    text = text.replace('Ã£', 'ã')   # a tilde
-    text = text.replace('Ã¤', 'ä')   # a diaeresis
-    text = text.replace('Ã±', 'ñ')   # n tilde
     
-    # Normalize common UTF-8 symbols
-    text = text.replace('\u201c', '"').replace('\u201d', '"')  # Smart quotes
-    text = text.replace('\u2018', "'").replace('\u2019', "'")  # Smart apostrophes
-    text = text.replace('\u2013', '-').replace('\u2014', '-')  # En dash and em dash
-    text = text.replace('\u00a0', ' ')  # Non-breaking space
-    text = text.replace('\u00a3', '£').replace('\u20ac', '€').replace('\u00a5', '¥')  # Currency symbols
-    text = text.replace('\u2026', '...')  # Horizontal ellipsis
-    text = text.replace('\u201e', '"').replace('\u201c', '"')  # Double low-9 quotation mark
-    text = text.replace('\u201a', "'").replace('\u2018', "'")  # Single low-9 quotation mark
+    best = len(_CATEGORY_KEYWORDS)
+    for _, priority in _CATEGORY_AUTOMATON.iter(text_lower):
+        if priority < best:
+            best = priority
+            if best == 0:
+                break
     
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+    if best < len(_CATEGORY_KEYWORDS):
+        return _CATEGORY_KEYWORDS[best][0]
+    return "CATEGORY_GENERAL"
 
-def is_meaningful_entity(entity_text: str, label: str) -> bool:
+def _iter_sentence_labels(sentences: List[str], n_process: Optional[int] = None, nlp=None) -> Iterator[Tuple[str, List[Dict], str]]:
     """
-    Check if an entity is meaningful and not ambiguous
+    Run spaCy NER and lightweight classification over sentences, keeping named entities and categories apart
     
     Args:
-        entity_text (str): The entity text
-        label (str): The entity label
+        sentences (List[str]): List of sentences to process
+        n_process (Optional[int]): Worker processes for spaCy NER, defaults to TEXT2DATASET_N_PROCESS
+        nlp (spacy.language.Language, optional): Model to use instead of the shared en_core_web_sm
         
-    Returns:
-        bool: True if entity is meaningful
+    Yields:
+        Tuple[str, List[Dict], str]: Sentence, its named entities and its CATEGORY_* label
     """
-    # Remove empty or whitespace-only entities
-    if not entity_text or not entity_text.strip():
-        return False
-    
-    # Remove single character entities (except for specific cases)
-    if len(entity_text.strip()) <= 1:
-        # Allow currency symbols for MONEY entities
-        if label == "MONEY" and entity_text.strip() in ['$', '£', '€', '¥']:
-            return True
-        return False
-    
-    # Remove entities that are just numbers or symbols
-    if re.match(r'^[0-9\W]+$', entity_text.strip()):
-        # Allow MONEY entities that contain currency symbols
-        if label == "MONEY" and re.search(r'[£$€¥]', entity_text):
-            return True
-        return False
-    
-    # Remove entities that are common stop words
-    stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can'}
-    if entity_text.lower() in stop_words:
-        return False
-    
-    # Remove entities with excessive punctuation
-    if len(re.findall(r'[^\w\s]', entity_text)) > len(entity_text) / 2:
-        return False
-    
-    # For MONEY entities, ensure they contain currency information
-    if label == "MONEY":
-        # Must contain at least one currency symbol or currency word
-        currency_symbols = ['$','£','€','¥']
-        currency_words = ['dollar', 'pound', 'euro', 'yen', 'usd', 'gbp', 'eur', 'jpy']
-        has_symbol = any(symbol in entity_text for symbol in currency_symbols)
-        has_word = any(word in entity_text.lower() for word in currency_words)
-        if not (has_symbol or has_word):
-            return False
-    
-    # Special handling for time-like MONEY entities (e.g., "£5.60 an hour")
-    if label == "TIME" and re.search(r'[£$€¥][0-9,.]+\s*(?:an\s+hour|per\s+hour|hour)', entity_text.lower()):
-        return False  # Let the MONEY regex pattern catch these instead
+    entity_count = 0
+    ner_errors = 0
+    classification_errors = 0
     
-    # Filter out ambiguous phrases like "the end of"
-    ambiguous_phrases = [
-        'the end of', 'the beginning of', 'the start of', 'the middle of',
-        'end of', 'beginning of', 'start of', 'middle of',
-        'a period', 'the period', 'period of'
-    ]
-    if any(phrase in entity_text.lower() for phrase in ambiguous_phrases):
-        return False
+    logger.info(f"Processing {len(sentences)} sentences with Smart Mode")
     
-    return True
-
-def label_entities_smart(sentences: List[str]) -> List[Dict]:
-    """
-    Label entities in sentences using spaCy NER + lightweight classification
+    sentences = [sentence for sentence in sentences if sentence and sentence.strip()]
+    # Duplicate sentences are labeled once and their entities reused
+    unique_sentences = list(dict.fromkeys(sentences))
     
-    Args:
-        sentences (List[str]): List of sentences to process
-        
-    Returns:
-        List[Dict]: List of dictionaries containing text, entity, and label
-    """
-    results = []
+    # First, extract named entities using spaCy (if available)
+    if nlp is None:
+        nlp = get_spacy_model()
+    if nlp:
+        ner_results = ner_entities(nlp, unique_sentences, n_process)
+    else:
+        # If spaCy is not available, use fallback extraction
+        ner_results = ((sentence, extract_entities_fallback(sentence), None) for sentence in unique_sentences)
     
-    logger.info(f"Processing {len(sentences)} sentences with Smart Mode")
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
     
-    for i, sentence in enumerate(sentences):
-        if not sentence.strip():
+    labels_by_sentence = {}
+    for sentence in sentences:
+        if sentence in labels_by_sentence:
+            entities, category = labels_by_sentence[sentence]
+            entity_count += len(entities) + 1
+            yield sentence, entities, category
             continue
-            
-        logger.info(f"Processing sentence {i+1}/{len(sentences)}: {sentence[:50]}...")
-            
-        # First, extract named entities using spaCy (if available)
-        entities = []
-        if nlp:
-            try:
-                doc = nlp(sentence)
-                for ent in doc.ents:
-                    # Skip empty or whitespace-only entities
-                    if not ent.text.strip():
-                        continue
-                        
-                    # Fix MONEY labels and clean UTF-8 symbols
-                    label = ent.label_
-                    entity_text = ent.text.strip()
-                    
-                    # Handle MONEY entities specifically
-                    if label == "MONEY":
-                        # Remove extra whitespace and normalize currency symbols
-                        entity_text = re.sub(r'\s+', ' ', entity_text)
-                        entity_text = entity_text.replace('\u00a3', '£').replace('\u20ac', '€').replace('\u00a5', '¥')
-                    
-                    # Clean UTF-8 symbols and normalize text
-                    entity_text = clean_text(entity_text)
-                    
-                    # Skip ambiguous or meaningless entity spans
-                    if is_meaningful_entity(entity_text, label):
-                        entities.append({
-                            "text": sentence,
-                            "entity": entity_text,
-                            "label": label
-                        })
-            except Exception as e:
-                logger.error(f"Error in spaCy NER for sentence: {e}")
-                # Fallback to regex-based extraction
-                fallback_entities = extract_entities_fallback(sentence)
-                entities.extend(fallback_entities)
-        else:
-            # If spaCy is not available, use fallback extraction
+        
+        # First occurrence: the next NER result belongs to this sentence
+        _, entities, error = next(ner_results)
+        if debug_enabled:
+            logger.debug("Processing sentence %d/%d: %s...", len(labels_by_sentence) + 1, len(unique_sentences), sentence[:50])
+        
+        if error is not None:
+            # Only the first failure gets a traceback; the rest are counted
+            ner_errors += 1
+            if ner_errors == 1:
+                logger.error(f"Error in spaCy NER for sentence: {error}", exc_info=error)
+            # Fallback to regex-based extraction
             entities = extract_entities_fallback(sentence)
         
         # Then classify the sentence using lightweight classification
         try:
             category = classify_category(sentence)
-            entities.append({
-                "text": sentence,
-                "entity": sentence,
-                "label": category
-            })
-            logger.info(f"Classification result: {category}")
+            if debug_enabled:
+                logger.debug("Classification result: %s", category)
         except Exception as e:
-            logger.error(f"Error in text classification: {e}")
+            classification_errors += 1
+            if classification_errors == 1:
+                logger.exception(f"Error in text classification: {e}")
             # Fallback: Add a general category
-            entities.append({
-                "text": sentence,
-                "entity": sentence,
-                "label": "CATEGORY_GENERAL"
-            })
+            category = "CATEGORY_GENERAL"
         
-        results.extend(entities)
+        labels_by_sentence[sentence] = (entities, category)
+        entity_count += len(entities) + 1
+        yield sentence, entities, category
+    
+    if ner_errors > 1:
+        logger.warning(f"spaCy NER failed for {ner_errors} sentences")
+    if classification_errors > 1:
+        logger.warning(f"Text classification failed for {classification_errors} sentences")
     
-    logger.info(f"Smart Mode processing complete. Generated {len(results)} entities.")
-    return results
+    logger.info(f"Smart Mode processing complete. Generated {entity_count} entities.")
 
-def extract_entities_fallback(sentence: str) -> List[Dict]:
+def iter_entities_smart(sentences: List[str], n_process: Optional[int] = None, nlp=None) -> Iterator[Dict]:
     """
-    Fallback method for entity extraction using regex patterns
+    Label entities in sentences using spaCy NER + lightweight classification, yielding them as they are produced
     
     Args:
-        sentence (str): Sentence to process
+        sentences (List[str]): List of sentences to process
+        n_process (Optional[int]): Worker processes for spaCy NER, defaults to TEXT2DATASET_N_PROCESS
+        nlp (spacy.language.Language, optional): Model to use instead of the shared en_core_web_sm
         
-    Returns:
-        List[Dict]: List of extracted entities
+    Yields:
+        Dict: Dictionary containing text, entity, and label
     """
-    # Clean the sentence first to fix encoding issues
-    sentence = clean_text(sentence)
-    
-    entities = []
-    
-    # Pattern for dates
-    date_patterns = [
-        r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b',
-        r'\b\d{4}\b',
-        r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{1,2},? \d{4}\b'
-    ]
-    
-    for pattern in date_patterns:
-        matches = re.findall(pattern, sentence, re.IGNORECASE)
-        for match in matches:
-            clean_match = clean_text(match)
-            if is_meaningful_entity(clean_match, "DATE"):
-                entities.append({
-                    "text": sentence,
-                    "entity": clean_match,
-                    "label": "DATE"
-                })
-    
-    # Pattern for emails
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    emails = re.findall(email_pattern, sentence)
-    for email in emails:
-        clean_email = clean_text(email)
-        if is_meaningful_entity(clean_email, "EMAIL"):
-            entities.append({
-                "text": sentence,
-                "entity": clean_email,
-                "label": "EMAIL"
-            })
-    
-    # Pattern for phone numbers
-    phone_pattern = r'(?:\+?1[-.\s]?)?\(?[0-9]{3}\)?[-.\s]?[0-9]{3}[-.\s]?[0-9]{4}'
-    phones = re.findall(phone_pattern, sentence)
-    for phone in phones:
-        clean_phone = clean_text(phone)
-        if is_meaningful_entity(clean_phone, "PHONE"):
-            entities.append({
-                "text": sentence,
-                "entity": clean_phone,
-                "label": "PHONE"
-            })
-    
-    # Pattern for money/currency (enhanced to catch time-like MONEY entities)
-    money_patterns = [
-        r'[£$€¥][0-9,]+(?:\.[0-9]{2})?\s*(?:an\s+hour|per\s+hour|hour)',  # Special pattern for hourly rates (must come first)
-        r'\$[0-9,]+(?:\.[0-9]{2})?',
-        r'£[0-9,]+(?:\.[0-9]{2})?',
-        r'€[0-9,]+(?:\.[0-9]{2})?',
-        r'¥[0-9,]+(?:\.[0-9]{2})?',
-        r'[0-9,]+(?:\.[0-9]{2})?\s*(?:dollars|USD|pounds|GBP|euros|EUR|yen|JPY)'
-    ]
-    
-    for pattern in money_patterns:
-        matches = re.findall(pattern, sentence, re.IGNORECASE)
-        for match in matches:
-            clean_match = clean_text(match)
-            if is_meaningful_entity(clean_match, "MONEY"):
-                entities.append({
-                    "text": sentence,
-                    "entity": clean_match,
-                    "label": "MONEY"
-                })
+    for sentence, entities, category in _iter_sentence_labels(sentences, n_process, nlp):
+        yield from entities
+        # The sentence category follows its named entities
+        yield {
+            "text": sentence,
+            "entity": sentence,
+            "label": category,
+            "start": 0,
+            "end": len(sentence)
+        }
+
+def label_entities_smart(sentences: List[str], n_process: Optional[int] = None, nlp=None) -> List[Dict]:
+    """
+    Label entities in sentences using spaCy NER + lightweight classification
     
-    return entities
+    Args:
+        sentences (List[str]): List of sentences to process
+        n_process (Optional[int]): Worker processes for spaCy NER, defaults to TEXT2DATASET_N_PROCESS
+        nlp (spacy.language.Language, optional): Model to use instead of the shared en_core_web_sm
+        
+    Returns:
+        List[Dict]: List of dictionaries containing text, entity, and label
+    """
+    return list(iter_entities_smart(sentences, n_process, nlp))
 
 def convert_to_spacy_format(sentences: List[str]) -> List[Tuple[str, Dict]]:
     """
-    Convert labeled data to spaCy training format: (text, {"entities": [(start, end, label), ...]})
+    Convert labeled data to spaCy training format: (text, {"entities": [(start, end, label), ...], "cats": {category: 1.0}})
     
     Args:
         sentences (List[str]): List of sentences to process
@@ -338,28 +207,24 @@ def convert_to_spacy_format(sentences: List[str]) -> List[Tuple[str, Dict]]:
     Returns:
         List[Tuple[str, Dict]]: List of tuples in spaCy format
     """
-    # Get labeled entities
-    labeled_data = label_entities_smart(sentences)
-    
-    # Group by text
-    text_entities = {}
-    for item in labeled_data:
-        text = item["text"]
-        entity = item["entity"]
-        label = item["label"]
-        
-        if text not in text_entities:
-            text_entities[text] = []
-        
-        # Find the start and end positions of the entity in the text
-        start = text.find(entity)
-        if start != -1:  # Only add if entity is found
-            end = start + len(entity)
-            text_entities[text].append((start, end, label))
+    # Group entity spans by the text their offsets refer to (the cleaned sentence for regex fallback entities)
+    text_entities = defaultdict(list)
+    text_categories = {}
+    for sentence, entities, category in _iter_sentence_labels(sentences):
+        if sentence in text_categories:
+            continue
+        for entity in entities:
+            text_entities[entity["text"]].append((entity["start"], entity["end"], entity["label"]))
+        # Categories arrive apart from named entities and are stored as spaCy "cats"
+        text_entities.setdefault(sentence, [])
+        text_categories[sentence] = category
     
     # Convert to spaCy format
     spacy_format = []
     for text, entities in text_entities.items():
-        spacy_format.append((text, {"entities": entities}))
+        annotations = {"entities": drop_overlapping_spans(entities)}
+        if text in text_categories:
+            annotations["cats"] = {text_categories[text]: 1.0}
+        spacy_format.append((text, annotations))
     
-    return spacy_format
\ No newline at end of file
+    return spacy_format
@@ -4,8 +4,15 @@ Pydantic models for request/response validation
 
 from pydantic import BaseModel, validator
 import re
+import string
 from typing import Optional, List
 
+# Pre-compiled validation patterns
+# Deletes every allowed username character, so anything left over is invalid
+_USERNAME_DELETE_TABLE = str.maketrans('', '', string.ascii_letters + string.digits + '_')
+_LETTER_RE = re.compile(r'[A-Za-z]')
+_DIGIT_RE = re.compile(r'[0-9]')
+
 class UserRegistration(BaseModel):
     """User registration model."""
     username: str
@@ -16,7 +23,7 @@ class UserRegistration(BaseModel):
     def validate_username(cls, v):
         if len(v) < 3:
             raise ValueError('Username must be at least 3 characters long')
-        if not re.match(r'^[a-zA-Z0-9_]+$', v):
+        if v.translate(_USERNAME_DELETE_TABLE):
             raise ValueError('Username can only contain letters, numbers, and underscores')
         return v
     
@@ -24,9 +31,9 @@ class UserRegistration(BaseModel):
     def validate_password(cls, v):
         if len(v) < 8:
             raise ValueError('Password must be at least 8 characters long')
-        if not re.search(r'[A-Za-z]', v):
+        if not _LETTER_RE.search(v):
             raise ValueError('Password must contain at least one letter')
-        if not re.search(r'[0-9]', v):
+        if not _DIGIT_RE.search(v):
             raise ValueError('Password must contain at least one number')
         return v
     
@@ -1,12 +1,39 @@
 import re
-import nltk
 from typing import List
 
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+# Pre-compiled regex patterns
+_WS_RE = re.compile(r'\s+')
+# Candidate sentence end: terminal punctuation, closing quotes/brackets, then whitespace or end of text
+_SENTENCE_END_RE = re.compile(r'([.!?]+)[)\]}"\'\u201d\u2019]*(?=\s|$)')
+
+# Words whose trailing period does not end a sentence (compared lowercased, without the period)
+_ABBREVIATIONS = frozenset({
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'mt', 'rev', 'gen', 'gov', 'sen', 'rep',
+    'messrs', 'adm', 'inc', 'ltd', 'co', 'corp', 'bros', 'vs',
+    'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec',
+    # Always sentence-internal, even before a capitalized word
+    'e.g', 'i.e', 'cf', 'etc',
+})
+_OPENING_PUNCT = '([{"\'\u201c\u2018'
+
+# Rule-based sentence splitter, built on first use by _get_sentencizer()
+_sentencizer = None
+
+def _get_sentencizer():
+    """
+    Build a blank English spaCy pipeline with the rule-based sentencizer
+    
+    Returns:
+        spacy.language.Language: Pipeline that only tokenizes and splits sentences
+    """
+    global _sentencizer
+    if _sentencizer is None:
+        import spacy
+        _sentencizer = spacy.blank("en")
+        _sentencizer.add_pipe("sentencizer")
+        # Only the tokenizer runs, so long documents stay cheap to process
+        _sentencizer.max_length = 10_000_000
+    return _sentencizer
 
 def clean_text(text: str) -> str:
     """
@@ -22,19 +49,77 @@ def clean_text(text: str) -> str:
         return ""
     
     # Remove extra whitespaces
-    text = re.sub(r'\s+', ' ', text)
+    text = _WS_RE.sub(' ', text)
     
     # Remove leading/trailing whitespaces
     text = text.strip()
     
     return text
 
-def split_sentences(text: str) -> List[str]:
+def _is_abbreviation(text: str, period: int, end: int) -> bool:
+    """
+    Check whether the period at the given index closes an abbreviation inside a sentence
+    
+    Args:
+        text (str): Text being split
+        period (int): Index of a lone period followed by whitespace or end of text
+        end (int): Index just past the period and any closing quotes or brackets
+        
+    Returns:
+        bool: True for single letters (A.), known abbreviations (Dr., e.g.) and dotted initialisms (U.S.);
+        False for a lowercase initialism such as p.m. when a capitalized word follows, since it ends the sentence
+    """
+    word = text[text.rfind(' ', 0, period) + 1:period].lstrip(_OPENING_PUNCT)
+    if word.lower() in _ABBREVIATIONS:
+        return True
+    if len(word) == 1:
+        return word.isalpha()
+    if '.' in word:
+        if not all(part.isalpha() and len(part) <= 2 for part in word.split('.')):
+            return False
+        if word.islower():
+            following = text[end:end + 16].lstrip().lstrip(_OPENING_PUNCT)
+            return not following[:1].isupper()
+        return True
+    return False
+
+def _scan_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences in a single pass over candidate sentence ends
+    
+    Args:
+        text (str): Cleaned text
+        
+    Returns:
+        List[str]: List of sentences
+    """
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        terminator = match.group(1)
+        if terminator == '.':
+            if _is_abbreviation(text, match.start(), match.end()):
+                continue
+        elif not terminator.strip('.'):
+            # An ellipsis trails off without ending the sentence
+            continue
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    
+    sentence = text[start:].strip()
+    if sentence:
+        sentences.append(sentence)
+    return sentences
+
+def split_sentences(text: str, use_spacy: bool = False) -> List[str]:
     """
     Split text into sentences
     
     Args:
         text (str): Cleaned text
+        use_spacy (bool): Use spaCy's rule-based sentencizer instead of the built-in scanner
         
     Returns:
         List[str]: List of sentences
@@ -42,13 +127,11 @@ def split_sentences(text: str) -> List[str]:
     if not text:
         return []
     
-    # Use NLTK sentence tokenizer
-    try:
-        from nltk.tokenize import sent_tokenize
-        sentences = sent_tokenize(text)
-    except Exception:
-        # Fallback to simple regex-based splitting
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
+    if use_spacy:
+        try:
+            doc = _get_sentencizer()(text)
+            return [sent.text.strip() for sent in doc.sents if sent.text.strip()]
+        except Exception:
+            pass
     
-    return sentences
\ No newline at end of file
+    return _scan_sentences(text)
@@ -3,8 +3,8 @@ Rate limiting utilities for API endpoints
 """
 
 import time
-from typing import Dict, Optional
-from collections import defaultdict, deque
+from collections import OrderedDict
+from typing import Dict, List, Optional
 import asyncio
 import logging
 
@@ -17,25 +17,25 @@ class RateLimiter:
         self.requests_per_minute = requests_per_minute
         self.burst_size = burst_size or requests_per_minute
         self.tokens = self.burst_size
-        self.last_update = time.time()
-        self._lock = asyncio.Lock()
+        self.tokens_per_second = requests_per_minute / 60
+        self.last_update = time.monotonic()
     
     async def is_allowed(self) -> bool:
         """Check if request is allowed based on rate limit."""
-        async with self._lock:
-            now = time.time()
-            time_passed = now - self.last_update
-            
-            # Add tokens based on time passed
-            tokens_to_add = time_passed * (self.requests_per_minute / 60)
-            self.tokens = min(self.burst_size, self.tokens + tokens_to_add)
-            self.last_update = now
-            
-            if self.tokens >= 1:
-                self.tokens -= 1
-                return True
-            
-            return False
+        # The bucket update never awaits, so it runs atomically on the event loop without a lock
+        now = time.monotonic()
+        time_passed = now - self.last_update
+        
+        # Add tokens based on time passed
+        tokens_to_add = time_passed * self.tokens_per_second
+        self.tokens = min(self.burst_size, self.tokens + tokens_to_add)
+        self.last_update = now
+        
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        
+        return False
     
     def get_reset_time(self) -> float:
         """Get time when rate limit will reset."""
@@ -43,7 +43,7 @@ class RateLimiter:
             return 0
         
         tokens_needed = 1 - self.tokens
-        return tokens_needed / (self.requests_per_minute / 60)
+        return tokens_needed / self.tokens_per_second
 
 class SlidingWindowRateLimiter:
     """Sliding window rate limiter implementation."""
@@ -51,49 +51,70 @@ class SlidingWindowRateLimiter:
     def __init__(self, requests_per_minute: int = 60, window_size: int = 60):
         self.requests_per_minute = requests_per_minute
         self.window_size = window_size  # in seconds
-        self.requests: Dict[str, deque] = defaultdict(deque)
-        self._lock = asyncio.Lock()
+        # Ring buffer of the last requests_per_minute accepted request times per identifier
+        self.requests: Dict[str, List[float]] = {}
+        self._heads: Dict[str, int] = {}
     
     async def is_allowed(self, identifier: str) -> bool:
         """Check if request is allowed for the given identifier."""
-        async with self._lock:
-            now = time.time()
-            window_start = now - self.window_size
-            
-            # Clean old requests
-            request_times = self.requests[identifier]
-            while request_times and request_times[0] < window_start:
-                request_times.popleft()
-            
-            # Check if under limit
-            if len(request_times) < self.requests_per_minute:
-                request_times.append(now)
-                return True
-            
-            return False
+        # Nothing here awaits, so it runs atomically on the event loop without a lock
+        now = time.monotonic()
+        window_start = now - self.window_size
+        
+        request_times = self.requests.get(identifier)
+        if request_times is None:
+            request_times = self.requests[identifier] = []
+        
+        # Under limit while the buffer is still filling up
+        if len(request_times) < self.requests_per_minute:
+            request_times.append(now)
+            return True
+        
+        # Full buffer: allowed only if the oldest accepted request has left the window
+        head = self._heads.get(identifier, 0)
+        if request_times and request_times[head] < window_start:
+            request_times[head] = now
+            self._heads[identifier] = (head + 1) % self.requests_per_minute
+            return True
+        
+        return False
+    
+    def is_idle(self, identifier: str, now: float) -> bool:
+        """Check if the identifier has no accepted requests inside the window ending at now."""
+        request_times = self.requests.get(identifier)
+        # The newest request sits just before the ring buffer head
+        return not request_times or request_times[self._heads.get(identifier, 0) - 1] < now - self.window_size
     
     def get_reset_time(self, identifier: str) -> float:
         """Get time when rate limit will reset for the identifier."""
-        request_times = self.requests.get(identifier, deque())
+        request_times = self.requests.get(identifier)
         if not request_times:
             return 0
         
         if len(request_times) < self.requests_per_minute:
             return 0
         
-        oldest_request = request_times[0]
-        return oldest_request + self.window_size - time.time()
+        oldest_request = request_times[self._heads.get(identifier, 0)]
+        return oldest_request + self.window_size - time.monotonic()
 
 class GlobalRateLimiter:
     """Global rate limiter manager."""
     
-    def __init__(self):
+    def __init__(self, max_user_limiters: int = 100_000, user_sweep_interval: int = 60):
         self.limiters: Dict[str, RateLimiter] = {}
-        self.user_limiters: Dict[str, SlidingWindowRateLimiter] = {}
+        # One limiter per user, least recently used first; idle users are swept and the count is capped
+        self.user_limiters: "OrderedDict[str, SlidingWindowRateLimiter]" = OrderedDict()
+        self.max_user_limiters = max_user_limiters
+        self.user_sweep_interval = user_sweep_interval
+        self._last_user_sweep = time.monotonic()
         self._lock = asyncio.Lock()
     
     async def get_limiter(self, endpoint: str, requests_per_minute: int = 60) -> RateLimiter:
         """Get or create a rate limiter for an endpoint."""
+        # Steady state: the limiter already exists, so skip the lock
+        limiter = self.limiters.get(endpoint)
+        if limiter is not None:
+            return limiter
         async with self._lock:
             if endpoint not in self.limiters:
                 self.limiters[endpoint] = RateLimiter(requests_per_minute)
@@ -101,11 +122,31 @@ class GlobalRateLimiter:
     
     async def get_user_limiter(self, user_id: str, requests_per_minute: int = 100) -> SlidingWindowRateLimiter:
         """Get or create a rate limiter for a user."""
+        limiter = self.user_limiters.get(user_id)
+        if limiter is not None:
+            self.user_limiters.move_to_end(user_id)
+            return limiter
         async with self._lock:
             if user_id not in self.user_limiters:
+                now = time.monotonic()
+                if now - self._last_user_sweep > self.user_sweep_interval:
+                    self._evict_idle_users(now)
+                    self._last_user_sweep = now
+                # Last resort under high-cardinality traffic: forget the least recently used users
+                while self.user_limiters and len(self.user_limiters) >= self.max_user_limiters:
+                    self.user_limiters.popitem(last=False)
                 self.user_limiters[user_id] = SlidingWindowRateLimiter(requests_per_minute)
             return self.user_limiters[user_id]
     
+    def _evict_idle_users(self, now: float) -> None:
+        """Forget user limiters with no requests inside their window."""
+        idle_users = [
+            user_id for user_id, limiter in self.user_limiters.items()
+            if limiter.is_idle(user_id, now)
+        ]
+        for user_id in idle_users:
+            del self.user_limiters[user_id]
+    
     async def check_rate_limit(self, endpoint: str, user_id: Optional[str] = None, 
                              requests_per_minute: int = 60) -> tuple[bool, float]:
         """Check rate limit for endpoint and optionally user."""
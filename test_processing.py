@@ -1,4 +1,5 @@
 import json
+from collections import Counter, defaultdict
 
 # Test data
 test_data = [
@@ -45,23 +46,20 @@ def process_json_for_visualization(data):
             # Check if it's spaCy format
             if isinstance(data[0], dict) and "text" in data[0] and "entities" in data[0]:
                 # Process spaCy format - focus only on entities and labels
-                entity_counts = {}
-                entity_texts = {}
+                entity_counts = Counter()
+                entity_texts = defaultdict(set)
                 for item in data:
-                    for entity in item.get("entities", []):
+                    for entity in item.get("entities", ()):
                         label = entity.get("label", "Unknown")
-                        text = entity.get("text", "Unknown")
-                        entity_counts[label] = entity_counts.get(label, 0) + 1
-                        if label not in entity_texts:
-                            entity_texts[label] = []
-                        entity_texts[label].append(text)
+                        entity_counts[label] += 1
+                        # Collect unique entity texts per label directly
+                        entity_texts[label].add(entity.get("text", "Unknown"))
                 
-                # Get unique entity texts per label
-                unique_entity_texts = {label: list(set(texts)) for label, texts in entity_texts.items()}
+                unique_entity_texts = {label: list(texts) for label, texts in entity_texts.items()}
                 
                 return {
                     "type": "spacy",
-                    "entity_counts": entity_counts,
+                    "entity_counts": dict(entity_counts),
                     "entity_texts": unique_entity_texts,
                     "total_entities": sum(entity_counts.values()),
                     "total_samples": len(data)
@@ -4,56 +4,33 @@ Test script for user plan API endpoint
 
 import sys
 import os
+import pytest
 
 # Add the project directory to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-# Global user plans dictionary (simulating the one in app.py)
-user_plans = {}
+import app
+from app import get_user_plan_name
 
-def test_user_plan_api():
+# (user, stored plan or None, expected plan)
+USER_PLAN_CASES = [
+    ("test_user_basic", "basic", "basic"),
+    ("test_user_premium", "premium", "premium"),
+    ("test_user_new", None, "basic"),
+    (None, None, "basic"),
+]
+
+@pytest.mark.parametrize("user,stored,expected", USER_PLAN_CASES)
+def test_user_plan_api(user, stored, expected, monkeypatch):
     """Test the user plan API endpoint"""
-    print("Testing User Plan API Endpoint...")
-    
-    # Test 1: Basic user
-    print("\nTest 1: Basic user")
-    user = "test_user_basic"
-    user_plans[user] = "basic"
-    
-    # Simulate checking user plan
-    user_plan = "basic"  # Default to basic plan
-    if user in user_plans and user_plans[user] == "premium":
-        user_plan = "premium"
-    
-    print(f"User {user} plan: {user_plan}")
-    assert user_plan == "basic", "Basic user should have basic plan"
-    
-    # Test 2: Premium user
-    print("\nTest 2: Premium user")
-    user = "test_user_premium"
-    user_plans[user] = "premium"
+    monkeypatch.setattr(app, "user_plans", {} if stored is None else {user: stored})
     
-    # Simulate checking user plan
-    user_plan = "basic"  # Default to basic plan
-    if user in user_plans and user_plans[user] == "premium":
-        user_plan = "premium"
+    # Check the plan app.py resolves for the user
+    user_plan = get_user_plan_name(user)
     
     print(f"User {user} plan: {user_plan}")
-    assert user_plan == "premium", "Premium user should have premium plan"
-    
-    # Test 3: User without any plan (default to basic)
-    print("\nTest 3: User without any plan")
-    user = "test_user_new"
-    
-    # Simulate checking user plan
-    user_plan = "basic"  # Default to basic plan
-    if user in user_plans and user_plans[user] == "premium":
-        user_plan = "premium"
-    
-    print(f"User {user} plan: {user_plan}")
-    assert user_plan == "basic", "New user should default to basic plan"
-    
-    print("\nAll tests passed!")
+    assert user_plan == expected, f"User {user} should have {expected} plan"
 
 if __name__ == "__main__":
-    test_user_plan_api()
\ No newline at end of file
+    print("Testing User Plan API Endpoint...")
+    sys.exit(pytest.main([__file__, "-q"]))
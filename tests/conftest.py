@@ -3,9 +3,12 @@ Pytest configuration and fixtures
 """
 
 import pytest
-import asyncio
+import io
 import tempfile
 import os
+import bcrypt
+import spacy
+from types import MappingProxyType, SimpleNamespace
 from unittest.mock import Mock
 from fastapi.testclient import TestClient
 from fastapi import FastAPI
@@ -18,13 +21,6 @@ from app import app
 from auth import auth_manager
 from cache import cache_manager
 
-@pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
-
 @pytest.fixture
 def test_client():
     """Create a test client for the FastAPI app."""
@@ -36,15 +32,19 @@ def temp_dir():
     with tempfile.TemporaryDirectory() as tmp_dir:
         yield tmp_dir
 
+def _make_request(cookies=None, headers=None, method="GET", url="http://test.com"):
+    """Build a lightweight stand-in for a FastAPI request."""
+    return SimpleNamespace(cookies=cookies or {}, headers=headers or {}, method=method, url=url)
+
+@pytest.fixture
+def make_request():
+    """Factory for lightweight FastAPI request objects."""
+    return _make_request
+
 @pytest.fixture
 def mock_request():
     """Create a mock FastAPI request object."""
-    request = Mock()
-    request.cookies = {}
-    request.headers = {}
-    request.method = "GET"
-    request.url = "http://test.com"
-    return request
+    return _make_request()
 
 @pytest.fixture
 def mock_upload_file():
@@ -52,11 +52,14 @@ def mock_upload_file():
     file = Mock()
     file.filename = "test.txt"
     file.content_type = "text/plain"
-    file.size = 1024
-    file.read = Mock(return_value=b"test content")
+    # Back the upload with a real buffer, exposed as .file like UploadFile
+    file.file = io.BytesIO(b"test content")
+    file.size = len(file.file.getbuffer())
+    file.read = file.file.read
+    file.seek = file.file.seek
     return file
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_text():
     """Sample text for testing."""
     return """
@@ -67,14 +70,22 @@ def sample_text():
     iPod portable media player, Apple Watch smartwatch, Apple TV digital media player, and AirPods wireless earbuds.
     """
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_dataset():
-    """Sample dataset for testing."""
-    return [
+    """Sample dataset for testing, read-only because it is shared across the session."""
+    return tuple(MappingProxyType(row) for row in [
         {"text": "Apple Inc. is a technology company.", "entity": "Apple Inc.", "label": "ORG"},
         {"text": "It was founded in April 1976.", "entity": "April 1976", "label": "DATE"},
         {"text": "The company is headquartered in Cupertino.", "entity": "Cupertino", "label": "GPE"}
-    ]
+    ])
+
+@pytest.fixture
+def ruler_nlp():
+    """Blank English pipeline that tags ORG entities with an entity_ruler."""
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([{"label": "ORG", "pattern": "Apple"}])
+    return nlp
 
 @pytest.fixture
 def authenticated_user():
@@ -82,13 +93,10 @@ def authenticated_user():
     username = "test_user"
     session_id = auth_manager.create_session(username)
     
-    mock_request = Mock()
-    mock_request.cookies = {"session_id": session_id}
-    
     return {
         "username": username,
         "session_id": session_id,
-        "request": mock_request
+        "request": _make_request({"session_id": session_id})
     }
 
 @pytest.fixture
@@ -97,15 +105,19 @@ def admin_user():
     username = "admin"
     session_id = auth_manager.create_session(username)
     
-    mock_request = Mock()
-    mock_request.cookies = {"session_id": session_id}
-    
     return {
         "username": username,
         "session_id": session_id,
-        "request": mock_request
+        "request": _make_request({"session_id": session_id})
     }
 
+_bcrypt_gensalt = bcrypt.gensalt
+
+@pytest.fixture(autouse=True)
+def fast_bcrypt(monkeypatch):
+    """Use the minimum bcrypt work factor so password hashing does not dominate test time."""
+    monkeypatch.setattr(bcrypt, "gensalt", lambda rounds=4, prefix=b"2b": _bcrypt_gensalt(rounds=4, prefix=prefix))
+
 @pytest.fixture(autouse=True)
 def cleanup_cache():
     """Clean up cache after each test."""
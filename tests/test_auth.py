@@ -4,10 +4,16 @@ Tests for authentication module
 
 import pytest
 import bcrypt
+from functools import lru_cache
 from unittest.mock import Mock, patch
 from fastapi.testclient import TestClient
 from auth import AuthManager, auth_manager
 
+@lru_cache(maxsize=None)
+def _cached_hash(password: str) -> str:
+    """Hash a password once per test session."""
+    return AuthManager().hash_password(password)
+
 class TestAuthManager:
     """Test cases for AuthManager class."""
     
@@ -32,7 +38,7 @@ class TestAuthManager:
     def test_verify_password_correct(self):
         """Test password verification with correct password."""
         password = "test_password_123"
-        hashed = self.auth_manager.hash_password(password)
+        hashed = _cached_hash(password)
         
         assert self.auth_manager.verify_password(password, hashed) is True
     
@@ -40,7 +46,7 @@ class TestAuthManager:
         """Test password verification with incorrect password."""
         password = "test_password_123"
         wrong_password = "wrong_password"
-        hashed = self.auth_manager.hash_password(password)
+        hashed = _cached_hash(password)
         
         assert self.auth_manager.verify_password(wrong_password, hashed) is False
     
@@ -4,10 +4,16 @@ Tests for cache module
 
 import pytest
 import asyncio
-import time
 from unittest.mock import patch
+import utils
 from cache import CacheManager, CacheDecorator, cached
 
+# Both LRU caches, built with a given max_entries
+CACHE_FACTORIES = [
+    pytest.param(lambda max_entries: CacheManager(default_ttl=60, max_entries=max_entries), id="cache"),
+    pytest.param(lambda max_entries: utils.CacheManager(max_entries=max_entries), id="utils"),
+]
+
 class TestCacheManager:
     """Test cases for CacheManager class."""
     
@@ -63,8 +69,15 @@ class TestCacheManager:
         self.cache.clear()
         assert len(self.cache._cache) == 0
     
-    def test_ttl_expiration(self):
+    def _freeze_clock(self, monkeypatch):
+        """Replace the cache clock with one the test advances by hand."""
+        clock = [1000.0]
+        monkeypatch.setattr(self.cache, "_now", lambda: clock[0])
+        return clock
+    
+    def test_ttl_expiration(self, monkeypatch):
         """Test TTL expiration."""
+        clock = self._freeze_clock(monkeypatch)
         key = "test_key"
         value = "test_value"
         
@@ -72,18 +85,19 @@ class TestCacheManager:
         self.cache.set(key, value, ttl=1)
         assert self.cache.get(key) == value
         
-        # Wait for expiration
-        time.sleep(1.1)
+        # Advance past expiration
+        clock[0] += 1.1
         assert self.cache.get(key) is None
     
-    def test_cleanup_expired(self):
+    def test_cleanup_expired(self, monkeypatch):
         """Test expired entry cleanup."""
+        clock = self._freeze_clock(monkeypatch)
         # Set entries with different TTLs
         self.cache.set("short", "value1", ttl=1)
         self.cache.set("long", "value2", ttl=60)
         
-        # Wait for short entry to expire
-        time.sleep(1.1)
+        # Advance past the short entry's expiration
+        clock[0] += 1.1
         
         # Cleanup should remove expired entries
         removed_count = self.cache.cleanup_expired()
@@ -124,36 +138,62 @@ class TestCacheManager:
         
         assert retrieved == complex_data
     
+    @pytest.mark.slow
     def test_thread_safety(self):
         """Test thread safety with concurrent access."""
-        import threading
+        from concurrent.futures import ThreadPoolExecutor
         
-        def set_values():
-            for i in range(100):
+        def set_values(batch):
+            for i in batch:
                 self.cache.set(f"key_{i}", f"value_{i}")
         
-        def get_values():
-            for i in range(100):
+        def get_values(batch):
+            for i in batch:
                 self.cache.get(f"key_{i}")
         
-        # Create multiple threads
-        threads = []
-        for _ in range(5):
-            threads.append(threading.Thread(target=set_values))
-            threads.append(threading.Thread(target=get_values))
-        
-        # Start all threads
-        for thread in threads:
-            thread.start()
-        
-        # Wait for all threads to complete
-        for thread in threads:
-            thread.join()
+        # Each worker reads or writes one batch of 10 keys; every key is written 5 times
+        batches = [range(start, start + 10) for start in range(0, 100, 10)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [
+                executor.submit(task, batch)
+                for _ in range(5)
+                for batch in batches
+                for task in (set_values, get_values)
+            ]
+            for future in futures:
+                future.result()
         
         # Verify cache integrity
         stats = self.cache.get_stats()
         assert stats["total_entries"] == 100
 
+@pytest.mark.parametrize("make_cache", CACHE_FACTORIES)
+class TestBoundedCache:
+    """Size and heap bounds shared by cache.CacheManager and utils.CacheManager."""
+    
+    def test_evicts_least_recently_used_at_capacity(self, make_cache):
+        """Test that the least recently used entry is evicted when the cache is full."""
+        cache = make_cache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+    
+    def test_expiry_heap_stays_bounded(self, make_cache):
+        """Test that overwrites and evictions do not grow the expiry heap without bound."""
+        cache = make_cache(10)
+        for i in range(10000):
+            cache.set("same", i)
+            cache.set(f"key_{i}", i)
+        
+        assert len(cache._cache) == 10
+        assert len(cache._expiry_heap) <= 2 * len(cache._cache)
+        assert cache.get("same") == 9999
+
 class TestCacheDecorator:
     """Test cases for CacheDecorator class."""
     
@@ -182,7 +222,8 @@ class TestCacheDecorator:
         assert result2 == 5
         assert call_count == 1  # Should not have increased
     
-    def test_async_function_caching(self):
+    @pytest.mark.asyncio
+    async def test_async_function_caching(self):
         """Test caching of asynchronous functions."""
         call_count = 0
         
@@ -190,21 +231,18 @@ class TestCacheDecorator:
         async def expensive_async_function(x, y):
             nonlocal call_count
             call_count += 1
-            await asyncio.sleep(0.1)  # Simulate async work
+            await asyncio.sleep(0)  # Yield to the loop like real async work
             return x * y
         
-        async def test_async_caching():
-            # First call should execute function
-            result1 = await expensive_async_function(3, 4)
-            assert result1 == 12
-            assert call_count == 1
-            
-            # Second call should use cache
-            result2 = await expensive_async_function(3, 4)
-            assert result2 == 12
-            assert call_count == 1  # Should not have increased
-        
-        asyncio.run(test_async_caching())
+        # First call should execute function
+        result1 = await expensive_async_function(3, 4)
+        assert result1 == 12
+        assert call_count == 1
+        
+        # Second call should use cache
+        result2 = await expensive_async_function(3, 4)
+        assert result2 == 12
+        assert call_count == 1  # Should not have increased
     
     def test_different_arguments(self):
         """Test that different arguments produce different cache keys."""
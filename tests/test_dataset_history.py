@@ -0,0 +1,94 @@
+"""
+Tests for file-based dataset history
+"""
+
+import pytest
+import json
+import os
+from dataset_history import DatasetHistory
+
+@pytest.fixture
+def history_dir(tmp_path, monkeypatch):
+    """Run in an empty directory, since history and outputs paths are relative."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "history"
+
+def make_history() -> DatasetHistory:
+    """File-based history, without MongoDB."""
+    return DatasetHistory(mongodb_uri=None)
+
+class TestDatasetHistory:
+    """Test cases for the append-only file history."""
+
+    def test_migrates_legacy_json_history(self, history_dir):
+        """Test that a history saved as one JSON array is converted to JSON Lines."""
+        legacy = [
+            {"id": 1, "filename": "a.csv", "timestamp": "2024-01-01T00:00:00"},
+            {"id": 2, "filename": "b.csv", "timestamp": "2024-01-02T00:00:00"},
+        ]
+        history_dir.mkdir()
+        (history_dir / "dataset_history.json").write_text(json.dumps(legacy))
+
+        history = make_history()
+
+        assert not (history_dir / "dataset_history.json").exists()
+        assert (history_dir / "dataset_history.jsonl").read_text().splitlines() == [json.dumps(entry) for entry in legacy]
+        assert history.get_history() == legacy
+
+    def test_add_is_visible_to_other_instances(self, history_dir):
+        """Test that a second instance reads existing entries and then only newly appended ones."""
+        writer = make_history()
+        writer.add_to_history("a.csv", "fast", "csv", 3, b"text,entity,label\n")
+        writer.add_to_history("b.json", "smart", "json", 5)
+        reader = make_history()
+        assert [entry["filename"] for entry in reader.get_history()] == ["a.csv", "b.json"]
+
+        writer.add_to_history("c.csv", "fast", "csv", 7)
+
+        assert [entry["id"] for entry in reader.get_history()] == [1, 2, 3]
+        assert reader.get_dataset_by_id(3)["entity_count"] == 7
+        assert reader.get_file_content(reader.get_dataset_by_id(1)) == b"text,entity,label\n"
+        assert [entry["filename"] for entry in reader.get_recent_datasets(2)] == ["c.csv", "b.json"]
+
+    def test_partial_line_is_read_once_complete(self, history_dir):
+        """Test that a line still being appended is skipped until its newline arrives."""
+        history = make_history()
+        history.add_to_history("a.csv", "fast", "csv")
+        line = json.dumps({"id": 2, "filename": "b.csv", "timestamp": "2024-01-01T00:00:00"})
+        path = history_dir / "dataset_history.jsonl"
+
+        with open(path, "a") as f:
+            f.write(line[:10])
+        assert len(history.get_history()) == 1
+
+        with open(path, "a") as f:
+            f.write(line[10:] + "\n")
+        assert [entry["filename"] for entry in history.get_history()] == ["a.csv", "b.csv"]
+
+    def test_delete_dataset_rewrites_history(self, history_dir):
+        """Test that deleting an entry is seen by the deleting instance and by other instances."""
+        writer = make_history()
+        for name in ("a.csv", "b.csv", "c.csv"):
+            writer.add_to_history(name, "fast", "csv")
+        reader = make_history()
+        assert len(reader.get_history()) == 3
+
+        assert writer.delete_dataset(2)
+        assert not writer.delete_dataset(2)
+
+        assert [entry["id"] for entry in writer.get_history()] == [1, 3]
+        assert [entry["id"] for entry in reader.get_history()] == [1, 3]
+        assert reader.get_dataset_by_id(2) == {}
+
+    def test_clear_history(self, history_dir):
+        """Test that clearing empties the history for every instance."""
+        writer = make_history()
+        writer.add_to_history("a.csv", "fast", "csv")
+        reader = make_history()
+        assert len(reader.get_history()) == 1
+
+        writer.clear_history()
+
+        assert writer.get_history() == []
+        assert reader.get_history() == []
+        assert os.path.getsize(history_dir / "dataset_history.jsonl") == 0
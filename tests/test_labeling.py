@@ -0,0 +1,130 @@
+"""
+Tests for Fast and Smart labeling modes
+"""
+
+import pytest
+from collections.abc import Iterator
+from spacy.language import Language
+import labeling_fast
+import labeling_smart
+from labeling_fast import iter_entities_fast, label_entities_fast
+from labeling_smart import classify_category, iter_entities_smart, label_entities_smart
+
+class DocRecorder:
+    """Pipeline component that records the text of every Doc it processes."""
+
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, doc):
+        self.texts.append(doc.text)
+        return doc
+
+@Language.factory("doc_recorder")
+def create_doc_recorder(nlp, name):
+    return DocRecorder()
+
+class TestFastMode:
+    """Test cases for Fast mode labeling."""
+
+    def test_labels_entities_with_offsets(self, ruler_nlp):
+        """Test that NER entities keep their sentence and character offsets."""
+        assert label_entities_fast(["I like Apple pie."], nlp=ruler_nlp) == [
+            {"text": "I like Apple pie.", "entity": "Apple", "label": "ORG", "start": 7, "end": 12},
+        ]
+
+    def test_duplicate_sentences_are_labeled_once(self, ruler_nlp):
+        """Test that repeated sentences reuse their entities and blank sentences are skipped."""
+        recorder = ruler_nlp.add_pipe("doc_recorder")
+        sentences = ["Apple rose.", "", "Apple rose.", "   ", None, "Shares fell."]
+
+        result = label_entities_fast(sentences, nlp=ruler_nlp)
+
+        assert recorder.texts == ["Apple rose.", "Shares fell."]
+        assert [item["text"] for item in result] == ["Apple rose.", "Apple rose."]
+
+    def test_iter_entities_streams_results(self, ruler_nlp):
+        """Test that iter_entities_fast is lazy and yields what label_entities_fast returns."""
+        recorder = ruler_nlp.add_pipe("doc_recorder")
+        sentences = [f"Apple sentence {i}." for i in range(3)]
+
+        entities = iter_entities_fast(sentences, nlp=ruler_nlp)
+        assert isinstance(entities, Iterator)
+        assert recorder.texts == []
+
+        assert list(entities) == label_entities_fast(sentences, nlp=ruler_nlp)
+
+    def test_convert_to_spacy_format(self, ruler_nlp, monkeypatch):
+        """Test that spaCy format uses the recorded entity offsets."""
+        monkeypatch.setattr(labeling_fast, "get_spacy_model", lambda: ruler_nlp)
+        assert labeling_fast.convert_to_spacy_format(["Apple and Apple."]) == [
+            ("Apple and Apple.", {"entities": [(0, 5, "ORG"), (10, 15, "ORG")]}),
+        ]
+
+class TestSmartMode:
+    """Test cases for Smart mode labeling."""
+
+    def test_category_follows_entities(self, ruler_nlp):
+        """Test that each sentence's category is yielded after its named entities."""
+        sentence = "Apple released new software."
+        assert label_entities_smart([sentence, sentence], nlp=ruler_nlp) == [
+            {"text": sentence, "entity": "Apple", "label": "ORG", "start": 0, "end": 5},
+            {"text": sentence, "entity": sentence, "label": "CATEGORY_TECHNOLOGY", "start": 0, "end": len(sentence)},
+        ] * 2
+
+    def test_iter_entities_streams_results(self, ruler_nlp):
+        """Test that iter_entities_smart is lazy and yields what label_entities_smart returns."""
+        recorder = ruler_nlp.add_pipe("doc_recorder")
+        sentences = ["Apple won the game.", "Nothing else."]
+
+        entities = iter_entities_smart(sentences, nlp=ruler_nlp)
+        assert isinstance(entities, Iterator)
+        assert recorder.texts == []
+
+        assert list(entities) == label_entities_smart(sentences, nlp=ruler_nlp)
+
+    def test_convert_to_spacy_format_stores_categories_as_cats(self, ruler_nlp, monkeypatch):
+        """Test that categories become spaCy "cats" instead of entity spans."""
+        monkeypatch.setattr(labeling_smart, "get_spacy_model", lambda: ruler_nlp)
+        result = labeling_smart.convert_to_spacy_format(["Apple rose.", "Apple rose.", "The film was long."])
+
+        # "Apple" contains the technology keyword "app"
+        assert result == [
+            ("Apple rose.", {"entities": [(0, 5, "ORG")], "cats": {"CATEGORY_TECHNOLOGY": 1.0}}),
+            ("The film was long.", {"entities": [], "cats": {"CATEGORY_ENTERTAINMENT": 1.0}}),
+        ]
+
+    def test_convert_to_spacy_format_drops_overlapping_spans(self, monkeypatch):
+        """Test that overlapping regex fallback spans are reduced to the longest one."""
+        monkeypatch.setattr(labeling_smart, "get_spacy_model", lambda: None)
+        sentence = "Paid Jan 5, 2020 dollars for the software."
+        # The regex fallback finds "Jan 5, 2020" (DATE) and the overlapping "2020 dollars" (MONEY)
+        result = labeling_smart.convert_to_spacy_format([sentence])
+
+        assert result == [(sentence, {"entities": [(5, 16, "DATE")], "cats": {"CATEGORY_TECHNOLOGY": 1.0}})]
+
+class TestClassifyCategory:
+    """Test cases for classify_category."""
+
+    CASES = [
+        ("New software for the government", "CATEGORY_TECHNOLOGY"),
+        ("The stock market game", "CATEGORY_SPORTS"),
+        ("The election and the economy", "CATEGORY_POLITICS"),
+        ("Hospital FINANCE report", "CATEGORY_BUSINESS"),
+        ("A doctor at the concert", "CATEGORY_HEALTH"),
+        ("The movie premiere", "CATEGORY_ENTERTAINMENT"),
+        ("She said hello", "CATEGORY_TECHNOLOGY"),  # Keywords match as substrings: "ai" in "said"
+        ("Nothing to see here", "CATEGORY_GENERAL"),
+        ("", "CATEGORY_GENERAL"),
+    ]
+
+    @pytest.mark.parametrize("text,expected", CASES)
+    def test_classify_category(self, text, expected):
+        """Test that the highest-priority category with a matching keyword wins."""
+        assert classify_category(text) == expected
+
+    @pytest.mark.parametrize("text,expected", CASES)
+    def test_regex_fallback_matches_automaton(self, text, expected, monkeypatch):
+        """Test that the per-category regex fallback gives the same result without pyahocorasick."""
+        monkeypatch.setattr(labeling_smart, "_CATEGORY_AUTOMATON", None)
+        assert classify_category(text) == expected
@@ -0,0 +1,168 @@
+"""
+Tests for shared labeling helpers
+"""
+
+import pytest
+from spacy.language import Language
+from labeling_common import clean_text, is_meaningful_entity, drop_overlapping_spans, extract_entities_fallback, ner_entities
+
+class BatchFailingComponent:
+    """Pipeline component that fails whole batches containing a BAD sentence."""
+
+    def __init__(self):
+        self.pipe_runs = 0
+
+    def __call__(self, doc):
+        if "BAD" in doc.text:
+            raise ValueError("bad sentence")
+        return doc
+
+    def pipe(self, docs, batch_size=None):
+        self.pipe_runs += 1
+        docs = list(docs)
+        if any("BAD" in doc.text for doc in docs):
+            raise ValueError("bad batch")
+        yield from docs
+
+@Language.factory("batch_failing_component")
+def create_batch_failing_component(nlp, name):
+    return BatchFailingComponent()
+
+class TestCleanText:
+    """Test cases for clean_text."""
+
+    def test_clean_text_empty(self):
+        """Test cleaning empty text."""
+        assert clean_text("") == ""
+
+    @pytest.mark.parametrize("original,expected", [
+        ("Â£60,000", "£60,000"),
+        ("Â€50", "€50"),
+        ("Â¥1000", "¥1000"),
+        ("25Â°C", "25°C"),
+        ("Â±5%", "±5%"),
+        ("Â§ 3", "§ 3"),
+        ("Â½ cup", "½ cup"),
+        ("Ã©lan", "élan"),
+        ("piÃ±a", "piña"),
+        ("Salary Â£5.60 an hour at the cafÃ©", "Salary £5.60 an hour at the café"),
+    ])
+    def test_clean_text_fixes_mojibake(self, original, expected):
+        """Test that misdecoded UTF-8 symbols are repaired."""
+        assert clean_text(original) == expected
+
+    def test_clean_text_normalizes_punctuation(self):
+        """Test that smart quotes, dashes and ellipses are normalized."""
+        result = clean_text("“quoted” ‘text’ – done…")
+        assert result == "\"quoted\" 'text' - done..."
+
+    def test_clean_text_composes_unicode(self):
+        """Test that decomposed characters are NFC-normalized without compatibility folding."""
+        assert clean_text("cafe\u0301") == "caf\u00e9"
+        assert clean_text("10\u00b2 and \u00bd") == "10\u00b2 and \u00bd"
+
+    def test_clean_text_collapses_whitespace(self):
+        """Test that runs of whitespace are collapsed and trimmed."""
+        assert clean_text("  New  York \n City  ") == "New York City"
+
+class TestIsMeaningfulEntity:
+    """Test cases for is_meaningful_entity."""
+
+    @pytest.mark.parametrize("entity_text,label", [
+        ("", "ORG"),
+        ("   ", "ORG"),
+        ("x", "PERSON"),
+        ("the", "ORG"),
+        ("100", "CARDINAL"),
+        ("!!", "ORG"),
+        ("the end of", "DATE"),
+        ("100", "MONEY"),
+        ("£5.60 an hour", "TIME"),
+    ])
+    def test_rejects_meaningless_entities(self, entity_text, label):
+        """Test that empty, trivial and ambiguous entities are rejected."""
+        assert is_meaningful_entity(entity_text, label) is False
+
+    @pytest.mark.parametrize("entity_text,label", [
+        ("New York", "GPE"),
+        ("$", "MONEY"),
+        ("$100", "MONEY"),
+        ("100 dollars", "MONEY"),
+        ("£5.60 an hour", "MONEY"),
+        ("Jan 5", "DATE"),
+    ])
+    def test_accepts_meaningful_entities(self, entity_text, label):
+        """Test that real entities are kept."""
+        assert is_meaningful_entity(entity_text, label) is True
+
+class TestExtractEntitiesFallback:
+    """Test cases for extract_entities_fallback."""
+
+    def test_extracts_entities_with_offsets(self):
+        """Test that regex entities carry offsets into the cleaned sentence."""
+        sentence = "Email john.doe@example.com by Jan 5, 2020 about the $1,200 fee."
+        entities = extract_entities_fallback(sentence)
+
+        labels = [(entity["entity"], entity["label"]) for entity in entities]
+        assert labels == [
+            ("Jan 5, 2020", "DATE"),
+            ("john.doe@example.com", "EMAIL"),
+            ("$1,200", "MONEY"),
+        ]
+        for entity in entities:
+            assert entity["text"][entity["start"]:entity["end"]] == entity["entity"]
+
+    def test_sentences_are_not_memoized(self):
+        """Test that only entity strings, not whole sentences, enter the clean_text cache."""
+        clean_text.cache_clear()
+        extract_entities_fallback("Paid $100 " + "and more " * 100)
+        assert clean_text.cache_info().currsize == 1
+
+    def test_hourly_rate_is_single_money_entity(self):
+        """Test that an hourly rate is not also reported as a bare amount."""
+        entities = extract_entities_fallback("Paid £5.60 an hour.")
+        assert [entity["entity"] for entity in entities] == ["£5.60 an hour"]
+
+class TestDropOverlappingSpans:
+    """Test cases for drop_overlapping_spans."""
+
+    def test_keeps_disjoint_spans_in_order(self):
+        """Test that non-overlapping spans are kept and sorted by start."""
+        spans = [(20, 25, "DATE"), (0, 8, "GPE")]
+        assert drop_overlapping_spans(spans) == [(0, 8, "GPE"), (20, 25, "DATE")]
+
+    def test_prefers_longest_span_at_same_start(self):
+        """Test that the longest span wins when spans share a start offset."""
+        spans = [(0, 8, "GPE"), (0, 14, "ORG")]
+        assert drop_overlapping_spans(spans) == [(0, 14, "ORG")]
+
+    def test_drops_duplicates_and_partial_overlaps(self):
+        """Test that duplicate and partially overlapping spans are dropped."""
+        spans = [(16, 29, "MONEY"), (16, 29, "MONEY"), (20, 32, "DATE"), (29, 33, "DATE")]
+        assert drop_overlapping_spans(spans) == [(16, 29, "MONEY"), (29, 33, "DATE")]
+
+class TestNerEntities:
+    """Test cases for ner_entities."""
+
+    def test_yields_entities_with_offsets(self, ruler_nlp):
+        """Test that each sentence is yielded in order with its entities."""
+        sentences = ["Apple makes phones.", "Nothing here."]
+        results = list(ner_entities(ruler_nlp, sentences))
+
+        assert [sentence for sentence, _, _ in results] == sentences
+        assert results[0][1] == [{"text": sentences[0], "entity": "Apple", "label": "ORG", "start": 0, "end": 5}]
+        assert results[1][1] == []
+        assert all(error is None for _, _, error in results)
+
+    def test_batch_failure_retries_sentences_individually(self, ruler_nlp):
+        """Test that one bad sentence does not fail the rest of its batch."""
+        component = ruler_nlp.add_pipe("batch_failing_component")
+        sentences = [f"Apple sentence {i}." for i in range(10)] + ["BAD Apple sentence."]
+
+        results = list(ner_entities(ruler_nlp, sentences))
+
+        assert [sentence for sentence, _, _ in results] == sentences
+        errors = [sentence for sentence, _, error in results if error is not None]
+        assert errors == ["BAD Apple sentence."]
+        assert all(entities for _, entities, error in results if error is None)
+        assert component.pipe_runs == 1
@@ -0,0 +1,48 @@
+"""
+Performance benchmarks for labeling hot paths
+
+Run with `pytest tests/test_perf.py --benchmark-autosave`, then compare
+later runs with `--benchmark-compare --benchmark-compare-fail=mean:10%`.
+"""
+
+import pytest
+from labeling_common import clean_text, is_meaningful_entity
+
+# Both helpers are lru_cached; benchmark the uncached bodies so cache hits do not hide regressions
+_clean_text = clean_text.__wrapped__
+_is_meaningful_entity = is_meaningful_entity.__wrapped__
+
+LONG_SAMPLE = (
+    "Salary Â£5.60 an hour at the cafÃ©, paid “weekly” – see notes… "
+    "Apple Inc. was founded in Cupertino, California in April 1976.   "
+) * 50
+
+ENTITY_CASES = [
+    ("New York", "GPE"),
+    ("the end of", "DATE"),
+    ("$100", "MONEY"),
+    ("100 dollars", "MONEY"),
+    ("£5.60 an hour", "TIME"),
+    ("100", "CARDINAL"),
+    ("x", "PERSON"),
+    ("Jan 5", "DATE"),
+]
+
+@pytest.mark.slow
+class TestLabelingPerformance:
+    """Benchmarks for clean_text and is_meaningful_entity."""
+
+    def test_clean_text_perf(self, benchmark):
+        """Benchmark cleaning a long noisy passage."""
+        result = benchmark(_clean_text, LONG_SAMPLE)
+        assert "£5.60" in result
+
+    def test_is_meaningful_entity_perf(self, benchmark):
+        """Benchmark filtering a batch of mixed entities."""
+        cases = ENTITY_CASES * 1000
+
+        def run():
+            return [_is_meaningful_entity(text, label) for text, label in cases]
+
+        result = benchmark(run)
+        assert len(result) == len(cases)
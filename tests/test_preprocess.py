@@ -0,0 +1,49 @@
+"""
+Tests for text preprocessing
+"""
+
+import pytest
+from preprocess import clean_text, split_sentences
+
+class TestSplitSentences:
+    """Test cases for split_sentences."""
+
+    def test_split_sentences_empty(self):
+        """Test splitting empty text."""
+        assert split_sentences("") == []
+
+    def test_splits_on_terminal_punctuation(self):
+        """Test that periods, question marks and exclamation marks end sentences."""
+        result = split_sentences("It works. Does it? Yes!! Done")
+        assert result == ["It works.", "Does it?", "Yes!!", "Done"]
+
+    def test_keeps_closing_quotes_and_brackets(self):
+        """Test that closing quotes and brackets stay with their sentence."""
+        result = split_sentences('He said "Stop." She stopped. (Yes.) No.')
+        assert result == ['He said "Stop."', "She stopped.", "(Yes.)", "No."]
+
+    @pytest.mark.parametrize("text", [
+        "Dr. Smith arrived at noon.",
+        "See U.S. policy on trade.",
+        "He left at 5 p.m. yesterday.",
+        "I am A. Then B.",
+        "Prices rose 3.5 percent today.",
+        "He waited... Then left.",
+        "Many firms, e.g. Apple and Google, make phones.",
+        "Use a tool, i.e. Python, for this.",
+        "See the appendix, cf. Table 2, for details.",
+        "Pack pens, paper, etc. and a snack.",
+    ])
+    def test_does_not_split_abbreviations_or_ellipses(self, text):
+        """Test that abbreviations, initials, decimals and ellipses do not end sentences."""
+        assert split_sentences(text) == [text]
+
+    def test_splits_after_sentence_final_initialism(self):
+        """Test that a lowercase initialism such as p.m. ends the sentence when a capitalized word follows."""
+        assert split_sentences("He left at 5 p.m. Then slept.") == ["He left at 5 p.m.", "Then slept."]
+        assert split_sentences('Back by 9 a.m. "Good," she said.') == ["Back by 9 a.m.", '"Good," she said.']
+
+    def test_splits_cleaned_text(self):
+        """Test splitting text that spanned several lines."""
+        text = clean_text("Apple Inc. is a company.\n    It makes phones.\n")
+        assert split_sentences(text) == ["Apple Inc. is a company.", "It makes phones."]
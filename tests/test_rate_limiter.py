@@ -0,0 +1,100 @@
+"""
+Tests for rate limiter module
+"""
+
+import pytest
+import random
+from collections import deque
+from types import SimpleNamespace
+import rate_limiter
+from rate_limiter import GlobalRateLimiter, SlidingWindowRateLimiter
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock for the rate limiter module, advanced by assigning clock.now."""
+    fake = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=lambda: fake.now))
+    return fake
+
+def deque_window_allows(request_times: deque, now: float, limit: int, window_size: int) -> bool:
+    """Reference sliding window: drop request times older than the window, then check the count."""
+    while request_times and request_times[0] < now - window_size:
+        request_times.popleft()
+    if len(request_times) < limit:
+        request_times.append(now)
+        return True
+    return False
+
+class TestSlidingWindowRateLimiter:
+    """Test cases for the ring-buffer SlidingWindowRateLimiter."""
+
+    @pytest.mark.asyncio
+    async def test_limits_within_window(self, clock):
+        """Test that requests beyond the limit are refused until the oldest one leaves the window."""
+        limiter = SlidingWindowRateLimiter(requests_per_minute=3, window_size=60)
+        assert [await limiter.is_allowed("user") for _ in range(4)] == [True, True, True, False]
+        assert limiter.get_reset_time("user") == 60
+
+        clock.now += 30
+        assert not await limiter.is_allowed("user")
+        assert limiter.get_reset_time("user") == 30
+
+        clock.now += 31
+        assert [await limiter.is_allowed("user") for _ in range(4)] == [True, True, True, False]
+
+    @pytest.mark.asyncio
+    async def test_identifiers_are_independent(self, clock):
+        """Test that one identifier's requests do not count against another."""
+        limiter = SlidingWindowRateLimiter(requests_per_minute=1)
+        assert await limiter.is_allowed("a")
+        assert not await limiter.is_allowed("a")
+        assert await limiter.is_allowed("b")
+        assert limiter.get_reset_time("unknown") == 0
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("seed", range(5))
+    async def test_matches_deque_sliding_window(self, clock, seed):
+        """Test that allow decisions match a deque-based sliding window on random traffic."""
+        rng = random.Random(seed)
+        limit, window_size = rng.randint(1, 5), rng.randint(1, 10)
+        limiter = SlidingWindowRateLimiter(requests_per_minute=limit, window_size=window_size)
+        reference = {identifier: deque() for identifier in "abc"}
+
+        for _ in range(2000):
+            clock.now += rng.choice([0, 0, 0.1, 0.5, 1, 3])
+            identifier = rng.choice("abc")
+            expected = deque_window_allows(reference[identifier], clock.now, limit, window_size)
+            assert await limiter.is_allowed(identifier) == expected
+
+class TestGlobalRateLimiter:
+    """Test cases for GlobalRateLimiter user limiters."""
+
+    @pytest.mark.asyncio
+    async def test_cap_evicts_least_recently_used_user(self, clock):
+        """Test that the user cap keeps recently active users and forgets the idle-longest one."""
+        limiter = GlobalRateLimiter(max_user_limiters=2)
+        alice = await limiter.get_user_limiter("alice")
+        await limiter.get_user_limiter("bob")
+        assert await limiter.get_user_limiter("alice") is alice
+
+        await limiter.get_user_limiter("carol")
+
+        assert list(limiter.user_limiters) == ["alice", "carol"]
+        assert limiter.user_limiters["alice"] is alice
+
+    @pytest.mark.asyncio
+    async def test_sweep_drops_idle_users(self, clock):
+        """Test that users with no requests inside their window are swept when a new user arrives."""
+        limiter = GlobalRateLimiter(user_sweep_interval=60)
+        idle = await limiter.get_user_limiter("idle")
+        assert await idle.is_allowed("idle")
+
+        clock.now += 45
+        active = await limiter.get_user_limiter("active")
+        assert await active.is_allowed("active")
+
+        clock.now += 30
+        await limiter.get_user_limiter("new")
+
+        assert list(limiter.user_limiters) == ["active", "new"]
+
@@ -3,74 +3,42 @@ Tests for utility modules
 """
 
 import pytest
+import hashlib
+import io
 import tempfile
 import os
 from unittest.mock import Mock, patch
 from fastapi import UploadFile
-from utils import FileValidator, TextProcessor, SecurityUtils, ResponseBuilder
+import utils
+from utils import FileValidator, TextProcessor, SecurityUtils, ResponseBuilder, CacheManager
+
+@pytest.fixture(scope="module")
+def make_upload():
+    """Factory for UploadFile mocks with a filename and size."""
+    def make(filename, size):
+        file = Mock(spec=UploadFile)
+        file.filename = filename
+        file.size = size
+        return file
+    return make
 
 class TestFileValidator:
     """Test cases for FileValidator class."""
     
-    def test_validate_file_upload_valid_txt(self):
-        """Test file validation with valid txt file."""
-        # Mock UploadFile
-        file = Mock(spec=UploadFile)
-        file.filename = "test.txt"
-        file.size = 1024  # 1KB
-        
-        result = FileValidator.validate_file_upload(file)
-        assert result is True
-    
-    def test_validate_file_upload_valid_pdf(self):
-        """Test file validation with valid PDF file."""
-        # Mock UploadFile
-        file = Mock(spec=UploadFile)
-        file.filename = "document.pdf"
-        file.size = 1024  # 1KB
-        
-        result = FileValidator.validate_file_upload(file)
-        assert result is True
-    
-    def test_validate_file_upload_invalid_extension(self):
-        """Test file validation with invalid extension."""
-        # Mock UploadFile
-        file = Mock(spec=UploadFile)
-        file.filename = "script.exe"
-        file.size = 1024
-        
-        result = FileValidator.validate_file_upload(file)
-        assert result is False
-    
-    def test_validate_file_upload_no_filename(self):
-        """Test file validation with no filename."""
-        # Mock UploadFile
-        file = Mock(spec=UploadFile)
-        file.filename = None
-        file.size = 1024
-        
-        result = FileValidator.validate_file_upload(file)
-        assert result is False
-    
-    def test_validate_file_upload_too_large(self):
-        """Test file validation with file too large."""
-        # Mock UploadFile
-        file = Mock(spec=UploadFile)
-        file.filename = "large.txt"
-        file.size = 20 * 1024 * 1024  # 20MB
-        
-        result = FileValidator.validate_file_upload(file, max_size=10 * 1024 * 1024)
-        assert result is False
-    
-    def test_validate_file_upload_suspicious_filename(self):
-        """Test file validation with suspicious filename."""
-        # Mock UploadFile
-        file = Mock(spec=UploadFile)
-        file.filename = "../../../etc/passwd"
-        file.size = 1024
-        
-        result = FileValidator.validate_file_upload(file)
-        assert result is False
+    @pytest.mark.parametrize("filename,size,max_size,expected", [
+        ("test.txt", 1024, 10 * 1024 * 1024, True),
+        ("document.pdf", 1024, 10 * 1024 * 1024, True),
+        ("script.exe", 1024, 10 * 1024 * 1024, False),
+        (None, 1024, 10 * 1024 * 1024, False),
+        ("large.txt", 20 * 1024 * 1024, 10 * 1024 * 1024, False),
+        ("../../../etc/passwd", 1024, 10 * 1024 * 1024, False),
+        ("../notes.txt", 1024, 10 * 1024 * 1024, False),
+        (".txt", 1024, 10 * 1024 * 1024, False),
+    ])
+    def test_validate_file_upload(self, make_upload, filename, size, max_size, expected):
+        """Test file validation for extension, size and suspicious names."""
+        file = make_upload(filename, size)
+        assert FileValidator.validate_file_upload(file, max_size=max_size) is expected
     
     def test_sanitize_filename(self):
         """Test filename sanitization."""
@@ -84,11 +52,13 @@ class TestFileValidator:
         sanitized = FileValidator.sanitize_filename(filename)
         assert sanitized == "test.txt"
         
-        # Test long filename
+        # Test long filename, which is not cached
+        cached_names = utils._sanitize_filename_cached.cache_info().currsize
         filename = "a" * 300 + ".txt"
         sanitized = FileValidator.sanitize_filename(filename)
         assert len(sanitized) <= 255
         assert sanitized.endswith(".txt")
+        assert utils._sanitize_filename_cached.cache_info().currsize == cached_names
 
 class TestTextProcessor:
     """Test cases for TextProcessor class."""
@@ -123,6 +93,11 @@ class TestTextProcessor:
         result = TextProcessor.validate_text_length(text, min_length=10)
         assert result is False
     
+    def test_validate_text_length_ignores_padding(self):
+        """Test that surrounding whitespace does not count toward the minimum length."""
+        assert TextProcessor.validate_text_length("    Short    ", min_length=10) is False
+        assert TextProcessor.validate_text_length("\n  Long enough  \t", min_length=10) is True
+    
     def test_validate_text_length_too_long(self):
         """Test text length validation with too long text."""
         text = "a" * 1000001  # Over 1MB
@@ -166,6 +141,16 @@ class TestSecurityUtils:
         # Should be a string
         assert isinstance(hash1, str)
     
+    def test_hash_content_chunked_inputs_match(self):
+        """Test that strings, bytes and file objects hash identically across chunk boundaries."""
+        content = "caf\u00e9 \u00a3" * 1000
+        expected = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        
+        assert SecurityUtils.hash_content(content, chunk_size=7) == expected
+        assert SecurityUtils.hash_content(content.encode('utf-8')) == expected
+        assert SecurityUtils.hash_content(io.BytesIO(content.encode('utf-8')), chunk_size=7) == expected
+        assert SecurityUtils.hash_content(io.StringIO(content), chunk_size=7) == expected
+    
     def test_sanitize_input_normal(self):
         """Test input sanitization with normal text."""
         text = "Hello world"
@@ -179,6 +164,21 @@ class TestSecurityUtils:
         assert "<script>" not in sanitized
         assert "Hello" in sanitized
     
+    def test_sanitize_input_removes_script_body(self):
+        """Test that script contents are removed along with the tags."""
+        sanitized = SecurityUtils.sanitize_input("<script>alert('xss')</script>Hello <b>world</b>")
+        assert sanitized == "Hello world"
+    
+    @pytest.mark.parametrize("text,expected", [
+        ("<" * 50000, "<" * 50000),
+        ("<script" * 10000, "<script" * 10000),
+        ("<b>ok</b>" + "<script" * 10000, "ok" + "<script" * 10000),
+        ("<script>x</script>" + "<" * 50000 + "end", "<" * 50000 + "end"),
+    ])
+    def test_sanitize_input_unclosed_markup(self, text, expected):
+        """Test that long runs of unclosed markup are left intact without quadratic rescans."""
+        assert SecurityUtils.sanitize_input(text) == expected
+    
     def test_sanitize_input_javascript_protocol(self):
         """Test input sanitization with javascript protocol."""
         text = "javascript:alert('xss')"
@@ -239,3 +239,39 @@ class TestResponseBuilder:
         assert response["pagination"]["per_page"] == 10
         assert response["pagination"]["total"] == 25
         assert response["pagination"]["pages"] == 3  # ceil(25/10)
+    
+    @pytest.mark.parametrize("total,per_page,pages", [(0, 10, 0), (10, 10, 1), (11, 10, 2), (5, 0, 0)])
+    def test_paginated_response_page_count(self, total, per_page, pages):
+        """Test page counts, including a zero page size."""
+        response = ResponseBuilder.paginated_response([], page=1, per_page=per_page, total=total)
+        assert response["pagination"]["pages"] == pages
+
+class TestCacheManager:
+    """Test cases for the simple CacheManager."""
+    
+    def test_get_expires_entries_lazily(self, monkeypatch):
+        """Test that expired entries are dropped when read."""
+        clock = [100.0]
+        monkeypatch.setattr(utils, "monotonic", lambda: clock[0])
+        cache = CacheManager()
+        cache.set("key", "value", ttl=10)
+        assert cache.get("key") == "value"
+        
+        clock[0] += 11
+        assert cache.get("key") is None
+        assert "key" not in cache._cache
+    
+    def test_cleanup_expired_skips_overwritten_keys(self, monkeypatch):
+        """Test that cleanup removes expired entries but not keys refreshed with a later TTL."""
+        clock = [100.0]
+        monkeypatch.setattr(utils, "monotonic", lambda: clock[0])
+        cache = CacheManager()
+        cache.set("short", 1, ttl=5)
+        cache.set("refreshed", 2, ttl=5)
+        cache.set("refreshed", 3, ttl=60)
+        
+        clock[0] += 10
+        cache.cleanup_expired()
+        
+        assert list(cache._cache) == ["refreshed"]
+        assert cache.get("refreshed") == 3
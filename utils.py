@@ -5,12 +5,45 @@ Utility functions and helpers
 import os
 import re
 import hashlib
-from typing import Optional, List, Dict, Any
+import heapq
+import secrets
+from collections import OrderedDict
+from functools import lru_cache
+from time import monotonic
+from typing import Optional, List, Dict, Any, BinaryIO, Tuple, Union
 from fastapi import UploadFile
 import logging
 
+from cache import compact_expiry_heap
+
 logger = logging.getLogger(__name__)
 
+_ALLOWED_EXTENSIONS = frozenset({'txt', 'pdf', 'docx', 'doc'})
+
+# Pre-compiled sanitization patterns
+_UNSAFE_FILENAME_CHARS_RE = re.compile(r'[<>:"/\\|?*]')
+_SUSPICIOUS_FILENAME_RE = re.compile(r'\.\.|[/\\<>:|*?]')
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_SCRIPT_BLOCK_RE = re.compile(r'<script.*?</script>', re.DOTALL | re.IGNORECASE)
+_SCRIPT_CLOSE_RE = re.compile(r'</script>', re.IGNORECASE)
+_UNSAFE_PROTOCOL_RE = re.compile(r'(?:javascript|data):', re.IGNORECASE)
+
+_MAX_FILENAME_LENGTH = 255
+
+def _sanitize_filename(filename: str) -> str:
+    """Replace unsafe characters, strip leading dots and spaces, and limit the length."""
+    # Remove or replace dangerous characters
+    filename = _UNSAFE_FILENAME_CHARS_RE.sub('_', filename)
+    # Remove leading dots and spaces
+    filename = filename.lstrip('. ')
+    # Limit length
+    if len(filename) > _MAX_FILENAME_LENGTH:
+        name, ext = os.path.splitext(filename)
+        filename = name[:_MAX_FILENAME_LENGTH-len(ext)] + ext
+    return filename
+
+_sanitize_filename_cached = lru_cache(maxsize=4096)(_sanitize_filename)
+
 class FileValidator:
     """File validation utilities."""
     
@@ -21,9 +54,9 @@ class FileValidator:
             return False
         
         # Check file extension
-        allowed_extensions = {'.txt', '.pdf', '.docx', '.doc'}
-        file_ext = os.path.splitext(file.filename.lower())[1]
-        if file_ext not in allowed_extensions:
+        stem, _, file_ext = file.filename.rpartition('.')
+        # As with os.path.splitext, leading dots (".txt") do not start an extension
+        if not stem.lstrip('.') or file_ext.lower() not in _ALLOWED_EXTENSIONS:
             logger.warning(f"Invalid file extension: {file_ext}")
             return False
         
@@ -33,8 +66,7 @@ class FileValidator:
             return False
         
         # Check for suspicious filenames
-        suspicious_patterns = ['..', '/', '\\', '<', '>', ':', '|', '*', '?']
-        if any(pattern in file.filename for pattern in suspicious_patterns):
+        if _SUSPICIOUS_FILENAME_RE.search(file.filename):
             logger.warning(f"Suspicious filename: {file.filename}")
             return False
         
@@ -42,16 +74,11 @@ class FileValidator:
     
     @staticmethod
     def sanitize_filename(filename: str) -> str:
-        """Sanitize filename for safe storage."""
-        # Remove or replace dangerous characters
-        filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
-        # Remove leading dots and spaces
-        filename = filename.lstrip('. ')
-        # Limit length
-        if len(filename) > 255:
-            name, ext = os.path.splitext(filename)
-            filename = name[:255-len(ext)] + ext
-        return filename
+        """Sanitize filename for safe storage. Names that fit the length limit are cached, since the same upload names recur."""
+        if len(filename) > _MAX_FILENAME_LENGTH:
+            # Keep cache keys bounded; oversized names are rare
+            return _sanitize_filename(filename)
+        return _sanitize_filename_cached(filename)
 
 class TextProcessor:
     """Text processing utilities."""
@@ -62,22 +89,15 @@ class TextProcessor:
         if not text:
             return ""
         
-        # Remove extra whitespaces
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove leading/trailing whitespaces
-        text = text.strip()
-        
-        return text
+        # Collapse whitespace runs and trim both ends in one split/join pass
+        return ' '.join(text.split())
     
     @staticmethod
     def validate_text_length(text: str, min_length: int = 10, max_length: int = 1000000) -> bool:
         """Validate text length."""
-        if not text or len(text.strip()) < min_length:
-            return False
-        if len(text) > max_length:
+        if not text or len(text) > max_length:
             return False
-        return True
+        return len(text.strip()) >= min_length
 
 class SecurityUtils:
     """Security-related utilities."""
@@ -88,19 +108,40 @@ class SecurityUtils:
         return secrets.token_urlsafe(length)
     
     @staticmethod
-    def hash_content(content: str) -> str:
-        """Generate hash for content."""
-        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+    def hash_content(content: Union[str, bytes, BinaryIO], chunk_size: int = 1 << 20) -> str:
+        """Generate hash for content.
+        
+        Large strings are encoded and file objects read chunk_size at a time,
+        so the full content is never copied at once.
+        """
+        digest = hashlib.sha256()
+        if isinstance(content, str):
+            for start in range(0, len(content), chunk_size):
+                digest.update(content[start:start + chunk_size].encode('utf-8'))
+        elif isinstance(content, (bytes, bytearray, memoryview)):
+            digest.update(content)
+        else:
+            while chunk := content.read(chunk_size):
+                digest.update(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        return digest.hexdigest()
     
     @staticmethod
     def sanitize_input(text: str) -> str:
         """Sanitize user input to prevent XSS."""
+        # Both passes only scan up to the last closing delimiter: no match can end after it,
+        # and without the bound every unclosed "<script" or "<" rescans the rest of the input
+        # Remove script tags and their content before the tag pass strips the tags alone
+        last_close = None
+        for last_close in _SCRIPT_CLOSE_RE.finditer(text):
+            pass
+        if last_close:
+            end = last_close.end()
+            text = _SCRIPT_BLOCK_RE.sub('', text[:end]) + text[end:]
         # Remove HTML tags
-        text = re.sub(r'<[^>]+>', '', text)
-        # Remove script tags and their content
-        text = re.sub(r'<script.*?</script>', '', text, flags=re.DOTALL | re.IGNORECASE)
+        end = text.rfind('>') + 1
+        text = _HTML_TAG_RE.sub('', text[:end]) + text[end:]
         # Remove javascript: and data: protocols
-        text = re.sub(r'(javascript|data):', '', text, flags=re.IGNORECASE)
+        text = _UNSAFE_PROTOCOL_RE.sub('', text)
         return text.strip()
 
 class ResponseBuilder:
@@ -132,44 +173,57 @@ class ResponseBuilder:
                 "page": page,
                 "per_page": per_page,
                 "total": total,
-                "pages": (total + per_page - 1) // per_page
+                "pages": -(-total // per_page) if per_page > 0 else 0
             }
         }
 
 class CacheManager:
     """Simple in-memory cache manager."""
     
-    def __init__(self):
-        self._cache: Dict[str, Any] = {}
-        self._timestamps: Dict[str, float] = {}
+    def __init__(self, max_entries: int = 10_000):
+        # key -> (expires_at, value), least recently used first
+        self._cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # (expires_at, key) min-heap, so cleanup only visits entries that have expired
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._max_entries = max_entries
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get value from cache."""
-        if key in self._cache:
-            return self._cache[key]
-        return default
+        entry = self._cache.get(key)
+        if entry is None:
+            return default
+        if entry[0] < monotonic():
+            del self._cache[key]
+            return default
+        self._cache.move_to_end(key)
+        return entry[1]
     
     def set(self, key: str, value: Any, ttl: int = 300) -> None:
         """Set value in cache with TTL."""
-        import time
-        self._cache[key] = value
-        self._timestamps[key] = time.time() + ttl
+        expires_at = monotonic() + ttl
+        self._cache[key] = (expires_at, value)
+        self._cache.move_to_end(key)
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+        if len(self._cache) > self._max_entries:
+            self._cache.popitem(last=False)
+        self._expiry_heap = compact_expiry_heap(
+            self._expiry_heap, len(self._cache),
+            ((entry[0], cached_key) for cached_key, entry in self._cache.items())
+        )
     
     def delete(self, key: str) -> bool:
         """Delete key from cache."""
-        if key in self._cache:
-            del self._cache[key]
-            del self._timestamps[key]
-            return True
-        return False
+        return self._cache.pop(key, None) is not None
     
     def cleanup_expired(self) -> None:
         """Clean up expired cache entries."""
-        import time
-        current_time = time.time()
-        expired_keys = [key for key, timestamp in self._timestamps.items() if timestamp < current_time]
-        for key in expired_keys:
-            self.delete(key)
+        current_time = monotonic()
+        while self._expiry_heap and self._expiry_heap[0][0] < current_time:
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            entry = self._cache.get(key)
+            # Skip heap items left behind by keys that were overwritten, evicted or deleted since
+            if entry is not None and entry[0] == expires_at:
+                del self._cache[key]
 
 # Global instances
 file_validator = FileValidator()